@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+
+"""
+ZED depth receiver for the appsrc sender's depth channel (--depth-port-offset)
+Reassembles the UDP chunks of each depth map, decodes it (PNG-16 or zstd) to
+uint16 millimetres and prints one NDJSON line per map with the capture
+timestamp shared with the video frame and the distance at the image centre.
+Maps are optionally saved as 16-bit PNG files.
+"""
+
+import argparse
+import json
+import os
+import socket
+import struct
+import sys
+import zlib
+
+import numpy as np
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+# Must match DEPTH_CHUNK in zed_appsrc_sender.py
+DEPTH_CHUNK = struct.Struct("<2sBBIQIHHHH")
+DEPTH_MAGIC = b"ZD"
+CODEC_NAMES = {0: "png", 1: "zstd"}
+
+
+def decode_png16(data: bytes) -> np.ndarray:
+    """Decode the sender's 16-bit greyscale PNG (None/Up filtered rows)."""
+    pos = 8
+    idat = b""
+    width = height = 0
+    while pos < len(data):
+        length, kind = struct.unpack_from(">I4s", data, pos)
+        body = data[pos + 8:pos + 8 + length]
+        if kind == b"IHDR":
+            width, height = struct.unpack_from(">II", body)
+        elif kind == b"IDAT":
+            idat += body
+        pos += 12 + length
+    rows = np.frombuffer(zlib.decompress(idat), dtype=np.uint8).reshape(height, width * 2 + 1)
+    raw = rows[:, 1:].copy()
+    for y in range(1, height):
+        if rows[y, 0] == 2:  # Up
+            raw[y] += raw[y - 1]
+    return raw.view(">u2").reshape(height, width).astype(np.uint16)
+
+
+def decode_depth(codec: int, payload: bytes, width: int, height: int) -> np.ndarray:
+    if codec == 1:
+        if zstandard is None:
+            raise RuntimeError("zstd depth needs the zstandard package")
+        raw = zstandard.ZstdDecompressor().decompress(payload, max_output_size=width * height * 2)
+        return np.frombuffer(raw, dtype="<u2").reshape(height, width)
+    return decode_png16(payload)
+
+
+class DepthAssembler:
+    """Collects chunks per (serial, seq); a newer map drops an incomplete older one."""
+
+    def __init__(self):
+        self.partial = {}
+        self.incomplete = 0
+
+    def add(self, packet: bytes):
+        if len(packet) < DEPTH_CHUNK.size:
+            return None
+        magic, _, codec, serial, capture_ns, seq, index, count, width, height = DEPTH_CHUNK.unpack_from(packet)
+        if magic != DEPTH_MAGIC:
+            return None
+        key = (serial, seq)
+        for stale in [k for k in self.partial if k[0] == serial and k[1] != seq]:
+            del self.partial[stale]
+            self.incomplete += 1
+        chunks = self.partial.setdefault(key, {})
+        chunks[index] = packet[DEPTH_CHUNK.size:]
+        if len(chunks) < count:
+            return None
+        del self.partial[key]
+        payload = b"".join(chunks[i] for i in range(count))
+        return {
+            "serial": serial,
+            "seq": seq,
+            "timestamp_ns": capture_ns,
+            "codec": CODEC_NAMES.get(codec, codec),
+            "bytes": len(payload),
+            "depth_mm": decode_depth(codec, payload, width, height),
+        }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Receive ZED depth maps from zed_appsrc_sender.py")
+    parser.add_argument("--port", type=int, required=True, help="Depth UDP port (sender RTP port + --depth-port-offset)")
+    parser.add_argument("--save-dir", default="", help="Write each map as <timestamp_ns>.png (16-bit, mm)")
+    args = parser.parse_args()
+
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 4 * 1024 * 1024)
+    sock.bind(("0.0.0.0", args.port))
+    assembler = DepthAssembler()
+    if args.save_dir:
+        os.makedirs(args.save_dir, exist_ok=True)
+    try:
+        while True:
+            packet, _ = sock.recvfrom(2048)
+            frame = assembler.add(packet)
+            if frame is None:
+                continue
+            depth = frame.pop("depth_mm")
+            h, w = depth.shape
+            frame["size"] = [w, h]
+            frame["center_mm"] = int(depth[h // 2, w // 2])
+            valid = depth[depth > 0]
+            frame["nearest_mm"] = int(valid.min()) if valid.size else 0
+            frame["incomplete_dropped"] = assembler.incomplete
+            if args.save_dir:
+                import cv2
+
+                cv2.imwrite(os.path.join(args.save_dir, f"{frame['timestamp_ns']}.png"), depth)
+            print(json.dumps(frame), flush=True)
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+
+"""
+ZED pose subscriber for the appsrc sender's multicast pose channel
+Joins the pose multicast group and prints one NDJSON line per record. Each
+record carries the same capture timestamp as the matching video buffer PTS.
+Pick the rate by port: base port = every grabbed frame, base + i = the i-th
+decimation configured on the sender (--pose-decimations, default 1,6).
+"""
+
+import argparse
+import json
+import socket
+import struct
+import sys
+
+# Must match POSE_RECORD in zed_appsrc_sender.py
+POSE_RECORD = struct.Struct("<2sBBIIQ3f4f")
+POSE_MAGIC = b"ZP"
+
+
+def unpack_pose_record(data: bytes):
+    if len(data) != POSE_RECORD.size:
+        return None
+    magic, version, state, serial, seq, capture_ns, tx, ty, tz, qx, qy, qz, qw = POSE_RECORD.unpack(data)
+    if magic != POSE_MAGIC:
+        return None
+    return {
+        "serial": serial,
+        "seq": seq,
+        "timestamp_ns": capture_ns,
+        "translation_m": [tx, ty, tz],
+        "orientation_xyzw": [qx, qy, qz, qw],
+        "tracking_state": state,
+        "version": version,
+    }
+
+
+def open_multicast_socket(group: str, port: int, interface: str = "0.0.0.0") -> socket.socket:
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM, socket.IPPROTO_UDP)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    if hasattr(socket, "SO_REUSEPORT"):
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
+    sock.bind(("", port))
+    membership = struct.pack("4s4s", socket.inet_aton(group), socket.inet_aton(interface))
+    sock.setsockopt(socket.IPPROTO_IP, socket.IP_ADD_MEMBERSHIP, membership)
+    return sock
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Subscribe to ZED per-frame pose records over UDP multicast")
+    parser.add_argument("--group", default="239.255.42.1", help="Multicast group (sender --pose-multicast)")
+    parser.add_argument("--port", type=int, default=5600, help="Port: base for full rate, base+i for decimated streams")
+    parser.add_argument("--interface", default="0.0.0.0", help="Local interface address to join on")
+    parser.add_argument("--serial", type=int, default=0, help="Only print records from this camera serial")
+    args = parser.parse_args()
+
+    sock = open_multicast_socket(args.group, args.port, args.interface)
+    try:
+        while True:
+            data, _ = sock.recvfrom(1024)
+            record = unpack_pose_record(data)
+            if record is None or (args.serial and record["serial"] != args.serial):
+                continue
+            print(json.dumps(record), flush=True)
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+
+"""
+RTP glass-to-glass latency probe for the ZED appsrc sender
+Listens for the sender's H.264 RTP stream, reads the ONVIF replay header
+extension (absolute capture time added by rtponviftimestamp) and reports
+per-frame end-to-end latency and jitter. Packets can be forwarded to a local
+port so the normal viewer keeps working while measuring.
+
+Latency is arrival of a frame's last packet minus its sensor capture time,
+so both machines' clocks must be synchronised (NTP/PTP) for absolute values.
+"""
+
+import argparse
+import socket
+import struct
+import sys
+import time
+from typing import Dict, List, Optional, Tuple
+
+# ONVIF Streaming Spec, replay header extension profile
+ONVIF_EXT_PROFILE = 0xABAC
+NTP_UNIX_OFFSET_S = 2_208_988_800
+
+
+def ntp_to_unix_ns(ntp: int) -> int:
+    """Convert a 64-bit NTP timestamp (32.32 fixed point) to Unix ns."""
+    seconds = ntp >> 32
+    fraction = ntp & 0xFFFFFFFF
+    return (seconds - NTP_UNIX_OFFSET_S) * 1_000_000_000 + (fraction * 1_000_000_000 >> 32)
+
+
+def parse_rtp(packet: bytes) -> Optional[Tuple[int, bool, Optional[int]]]:
+    """Return (rtp_timestamp, marker, capture_unix_ns or None) for an RTP packet."""
+    if len(packet) < 12 or packet[0] >> 6 != 2:
+        return None
+    has_ext = bool(packet[0] & 0x10)
+    csrc_count = packet[0] & 0x0F
+    marker = bool(packet[1] & 0x80)
+    rtp_ts = struct.unpack_from(">I", packet, 4)[0]
+    capture_ns = None
+    offset = 12 + 4 * csrc_count
+    if has_ext and len(packet) >= offset + 4:
+        profile, length_words = struct.unpack_from(">HH", packet, offset)
+        if profile == ONVIF_EXT_PROFILE and length_words >= 2 and len(packet) >= offset + 4 + 8:
+            capture_ns = ntp_to_unix_ns(struct.unpack_from(">Q", packet, offset + 4)[0])
+    return rtp_ts, marker, capture_ns
+
+
+class LatencyTracker:
+    """Per-frame latency from capture time to last-packet arrival, plus jitter."""
+
+    def __init__(self, max_pending: int = 64):
+        self.max_pending = max_pending
+        self.pending: Dict[int, int] = {}  # rtp timestamp -> capture ns
+        self.latencies_ms: List[float] = []
+        self.jitter_ms = 0.0
+        self.frames_without_ts = 0
+        self._last_latency_ms: Optional[float] = None
+
+    def on_packet(self, packet: bytes, arrival_ns: int) -> Optional[float]:
+        """Feed one packet; returns the frame latency (ms) when a frame completes."""
+        parsed = parse_rtp(packet)
+        if parsed is None:
+            return None
+        rtp_ts, marker, capture_ns = parsed
+        if capture_ns is not None:
+            self.pending.setdefault(rtp_ts, capture_ns)
+            if len(self.pending) > self.max_pending:
+                self.pending.pop(next(iter(self.pending)))
+        if not marker:
+            return None
+        capture_ns = self.pending.pop(rtp_ts, None)
+        if capture_ns is None:
+            self.frames_without_ts += 1
+            return None
+        latency_ms = (arrival_ns - capture_ns) / 1e6
+        if self._last_latency_ms is not None:
+            # RFC 3550 style smoothed jitter over the latency differences
+            self.jitter_ms += (abs(latency_ms - self._last_latency_ms) - self.jitter_ms) / 16.0
+        self._last_latency_ms = latency_ms
+        self.latencies_ms.append(latency_ms)
+        return latency_ms
+
+    def summary(self) -> str:
+        if not self.latencies_ms:
+            return f"frames=0 frames_without_ts={self.frames_without_ts}"
+        values = sorted(self.latencies_ms)
+
+        def pct(p: float) -> float:
+            return values[min(len(values) - 1, int(p * len(values)))]
+
+        mean = sum(values) / len(values)
+        return (
+            f"frames={len(values)} mean={mean:.1f}ms p50={pct(0.5):.1f}ms p95={pct(0.95):.1f}ms "
+            f"max={values[-1]:.1f}ms jitter={self.jitter_ms:.2f}ms frames_without_ts={self.frames_without_ts}"
+        )
+
+    def reset(self) -> None:
+        self.latencies_ms = []
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure ZED RTP stream latency from embedded capture times")
+    parser.add_argument("--port", type=int, default=5001, help="UDP port the sender streams to")
+    parser.add_argument("--forward", default="", help="Optional host:port to relay packets to (e.g. 127.0.0.1:6001)")
+    parser.add_argument("--interval", type=float, default=2.0, help="Seconds between summary lines")
+    parser.add_argument("--verbose", action="store_true", help="Print every frame's latency")
+    args = parser.parse_args()
+
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind(("0.0.0.0", args.port))
+    sock.settimeout(0.5)
+
+    forward_addr = None
+    if args.forward:
+        host, port = args.forward.rsplit(":", 1)
+        forward_addr = (host, int(port))
+
+    tracker = LatencyTracker()
+    totals = LatencyTracker()
+    print(f"Listening for RTP on UDP {args.port}" + (f", forwarding to {args.forward}" if forward_addr else ""))
+    last_report = time.monotonic()
+    try:
+        while True:
+            try:
+                packet, _ = sock.recvfrom(65536)
+            except socket.timeout:
+                packet = None
+            if packet is not None:
+                arrival_ns = time.time_ns()
+                if forward_addr:
+                    sock.sendto(packet, forward_addr)
+                latency = tracker.on_packet(packet, arrival_ns)
+                totals.on_packet(packet, arrival_ns)
+                if latency is not None and args.verbose:
+                    print(f"frame latency {latency:.1f} ms")
+            if time.monotonic() - last_report >= args.interval:
+                print(tracker.summary())
+                tracker.reset()
+                last_report = time.monotonic()
+    except KeyboardInterrupt:
+        print("\nTotal: " + totals.summary())
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -12,12 +12,29 @@ import threading
 import time
 import sys
 import socket
+import urllib.request
 from typing import Dict, Optional, Tuple
 import argparse
 
 class ZEDStreamReceiver:
-    def __init__(self, jetson_ip: str = "192.168.1.254"):
+    def __init__(self, jetson_ip: str = "192.168.1.254", rtcp_port_offset: int = 0, thumb_port_offset: int = 0,
+                 sender_http_port: int = 8000, subscribe: bool = False, fec: bool = False, rtx: bool = False):
         self.jetson_ip = jetson_ip
+        # Loss protection matching the sender's --fec-percentage (ULPFEC in RED) and --rtx
+        # (NACK-driven retransmission, which needs the rtpbin/RTCP path)
+        self.fec = fec
+        self.rtx = rtx
+        # Register this machine as a fan-out client of the sender while a stream is open,
+        # so extra viewers need no change to the sender's --host
+        self.subscribe = subscribe
+        # zed_appsrc_sender.py HTTP port, used to ask for a keyframe on (re)join (0 = never ask)
+        self.sender_http_port = sender_http_port
+        # When set, receive through rtpbin and send RTCP receiver reports back to the
+        # sender (zed_appsrc_sender.py --adaptive-bitrate) on RTP port + offset
+        self.rtcp_port_offset = rtcp_port_offset
+        # When set, sub-displays use the sender's thumbnail streams (RTP port + offset)
+        # and only the main camera's full-resolution stream is received and decoded
+        self.thumb_port_offset = thumb_port_offset
         self.streams = {
             0: {"port": 5001, "serial": "51370096", "name": "Camera 0", "active": True},
             1: {"port": 5002, "serial": "59919470", "name": "Camera 1", "active": True}, 
@@ -27,7 +44,8 @@ class ZEDStreamReceiver:
         
         self.main_camera = 0  # Which camera is currently main display
         self.frames = {}  # Store latest frames from each camera
-        self.capture_threads = {}
+        self.thumb_frames = {}  # Latest thumbnail-stream frames
+        self.capture_threads = {}  # (camera_id, thumbnail) -> thread
         self.running = False
         
         # Display settings
@@ -67,9 +85,36 @@ class ZEDStreamReceiver:
                    cv2.FONT_HERSHEY_SIMPLEX, 0.4, (64, 64, 64), 1)
         self.disabled_placeholder = disabled_placeholder
         
-    def create_gstreamer_pipeline(self, camera_id: int) -> str:
+    def create_gstreamer_pipeline(self, camera_id: int, thumbnail: bool = False) -> str:
         """Create GStreamer pipeline for receiving RTP stream"""
         port = self.streams[camera_id]["port"]
+        if thumbnail:
+            port += self.thumb_port_offset
+        elif self.fec:
+            # rtpstorage keeps packets ahead of the jitterbuffer so rtpulpfecdec can rebuild losses.
+            # Must match FEC_PT/RED_PT in zed_appsrc_sender.py
+            return (
+                f"udpsrc port={port} caps=\"application/x-rtp,media=video,clock-rate=90000,encoding-name=H264,payload=96\" "
+                "! rtpreddec pt=123 ! rtpstorage size-time=250000000 ! rtpssrcdemux "
+                "! rtpjitterbuffer do-lost=true latency=100 ! rtpulpfecdec pt=122 "
+                "! rtph264depay ! h264parse ! avdec_h264 ! "
+                "videoconvert ! appsink drop=true max-buffers=2"
+            )
+        elif self.rtcp_port_offset:
+            rtcp_port = port + self.rtcp_port_offset
+            # With --rtx the jitterbuffer NACKs missing packets; rtprtxreceive maps the
+            # retransmissions (pt 97, own SSRC) back onto the original stream
+            rtx_opts = "do-retransmission=true rtp-profile=avpf " if self.rtx else ""
+            rtx_recv = "! rtprtxreceive payload-type-map=\"application/x-rtp-pt-map,96=(uint)97\" " if self.rtx else ""
+            return (
+                f"rtpbin name=rtpbin latency=50 {rtx_opts}"
+                f"udpsrc port={port} caps=\"application/x-rtp,media=video,clock-rate=90000,encoding-name=H264,payload=96\" "
+                f"{rtx_recv}! rtpbin.recv_rtp_sink_0 "
+                f"udpsrc port={rtcp_port} ! rtpbin.recv_rtcp_sink_0 "
+                f"rtpbin.send_rtcp_src_0 ! udpsink host={self.jetson_ip} port={rtcp_port} sync=false async=false "
+                "rtpbin. ! rtph264depay ! h264parse ! avdec_h264 ! "
+                "videoconvert ! appsink drop=true max-buffers=2"
+            )
         pipeline = (
             f"udpsrc port={port} ! "
             "application/x-rtp,clock-rate=90000,payload=96 ! "
@@ -79,41 +124,100 @@ class ZEDStreamReceiver:
         )
         return pipeline
         
-    def capture_stream(self, camera_id: int):
+    def request_keyframe(self, camera_id: int):
+        """Ask the sender for an immediate IDR so a (re)joining stream starts without waiting a GOP"""
+        if not self.sender_http_port:
+            return
+        url = f"http://{self.jetson_ip}:{self.sender_http_port}/keyframe?port={self.streams[camera_id]['port']}"
+        try:
+            urllib.request.urlopen(urllib.request.Request(url, data=b"", method="POST"), timeout=0.5).close()
+        except Exception:
+            pass  # rate-limited (429) or sender without the endpoint; the next GOP still arrives
+        
+    def update_subscription(self, camera_id: int, thumbnail: bool, action: str):
+        """Add or remove this machine in the sender's client list for one stream"""
+        if not (self.subscribe and self.sender_http_port):
+            return
+        port = self.streams[camera_id]["port"]
+        client_port = port + self.thumb_port_offset if thumbnail else port
+        stream = "thumb" if thumbnail else "main"
+        url = (f"http://{self.jetson_ip}:{self.sender_http_port}/clients/{action}"
+               f"?port={port}&client_port={client_port}&stream={stream}")
+        try:
+            urllib.request.urlopen(urllib.request.Request(url, data=b"", method="POST"), timeout=0.5).close()
+        except Exception as e:
+            print(f"Warning: could not {action} subscription for Camera {camera_id}: {e}")
+        
+    def wants_stream(self, camera_id: int, thumbnail: bool) -> bool:
+        """Full streams are only kept open for the main camera when thumbnails are in use"""
+        return thumbnail or not self.thumb_port_offset or camera_id == self.main_camera
+        
+    def capture_stream(self, camera_id: int, thumbnail: bool = False):
         """Capture frames from a specific camera stream"""
         if not self.streams[camera_id]["active"]:
             return
             
-        pipeline = self.create_gstreamer_pipeline(camera_id)
+        frames = self.thumb_frames if thumbnail else self.frames
+        kind = "thumbnail" if thumbnail else "full"
+        pipeline = self.create_gstreamer_pipeline(camera_id, thumbnail)
+        # Subscribe first: opening the capture waits for the first packets
+        self.update_subscription(camera_id, thumbnail, "add")
         cap = cv2.VideoCapture(pipeline, cv2.CAP_GSTREAMER)
         
         if not cap.isOpened():
             print(f"Warning: Could not open stream for Camera {camera_id}")
+            self.update_subscription(camera_id, thumbnail, "remove")
             return
             
-        print(f"Started capture thread for Camera {camera_id}")
+        print(f"Started {kind} capture thread for Camera {camera_id}")
+        self.request_keyframe(camera_id)
         
-        while self.running:
+        stalled = False
+        while self.running and self.wants_stream(camera_id, thumbnail):
             ret, frame = cap.read()
             if ret:
-                self.frames[camera_id] = frame.copy()
+                frames[camera_id] = frame.copy()
+                stalled = False
             else:
+                if not stalled:
+                    self.request_keyframe(camera_id)
+                    stalled = True
                 # If we lose the stream, wait a bit and try to reconnect
                 time.sleep(0.1)
                 
         cap.release()
-        print(f"Stopped capture thread for Camera {camera_id}")
+        self.update_subscription(camera_id, thumbnail, "remove")
+        if self.thumb_port_offset and not thumbnail:
+            # Drop the stale full frame so a later switch back doesn't show it
+            self.frames.pop(camera_id, None)
+        print(f"Stopped {kind} capture thread for Camera {camera_id}")
+        
+    def start_capture_thread(self, camera_id: int, thumbnail: bool = False):
+        """Start a capture thread unless one is already running for this stream"""
+        existing = self.capture_threads.get((camera_id, thumbnail))
+        if existing is not None and existing.is_alive():
+            return
+        thread = threading.Thread(target=self.capture_stream, args=(camera_id, thumbnail))
+        thread.daemon = True
+        thread.start()
+        self.capture_threads[(camera_id, thumbnail)] = thread
         
     def start_capture_threads(self):
         """Start capture threads for all active cameras"""
         self.running = True
         for camera_id, stream_info in self.streams.items():
             if stream_info["active"]:
-                thread = threading.Thread(target=self.capture_stream, args=(camera_id,))
-                thread.daemon = True
-                thread.start()
-                self.capture_threads[camera_id] = thread
+                if self.thumb_port_offset:
+                    self.start_capture_thread(camera_id, thumbnail=True)
+                if self.wants_stream(camera_id, thumbnail=False):
+                    self.start_capture_thread(camera_id)
                 
+    def set_main_camera(self, camera_id: int):
+        """Switch the main display, subscribing to that camera's full stream if needed"""
+        self.main_camera = camera_id
+        if self.running and self.streams[camera_id]["active"]:
+            self.start_capture_thread(camera_id)
+            
     def stop_capture_threads(self):
         """Stop all capture threads"""
         self.running = False
@@ -122,15 +226,17 @@ class ZEDStreamReceiver:
             
     def get_frame(self, camera_id: int, is_main: bool = False) -> np.ndarray:
         """Get the latest frame from a camera, resized appropriately"""
-        if camera_id in self.frames:
-            frame = self.frames[camera_id].copy()
+        frames = self.thumb_frames if (self.thumb_port_offset and not is_main) else self.frames
+        if camera_id in frames:
+            frame = frames[camera_id].copy()
             if is_main:
                 frame = cv2.resize(frame, (self.main_width, self.main_height))
                 # Add main camera label
                 cv2.putText(frame, f"{self.streams[camera_id]['name']} (MAIN) - S/N {self.streams[camera_id]['serial']}", 
                            (10, 30), cv2.FONT_HERSHEY_SIMPLEX, 0.6, (0, 255, 0), 2)
             else:
-                frame = cv2.resize(frame, (self.sub_width, self.sub_height))
+                if frame.shape[1] != self.sub_width or frame.shape[0] != self.sub_height:
+                    frame = cv2.resize(frame, (self.sub_width, self.sub_height))
                 # Add sub camera label
                 cv2.putText(frame, f"Cam {camera_id} - S/N {self.streams[camera_id]['serial']}", 
                            (5, 20), cv2.FONT_HERSHEY_SIMPLEX, 0.4, (0, 255, 0), 1)
@@ -203,7 +309,7 @@ class ZEDStreamReceiver:
                 if clicked_sub < len(sub_cameras):
                     new_main = sub_cameras[clicked_sub]
                     print(f"Switching main display to Camera {new_main}")
-                    self.main_camera = new_main
+                    self.set_main_camera(new_main)
                     
     def run(self):
         """Main display loop"""
@@ -236,13 +342,13 @@ class ZEDStreamReceiver:
                 if key == ord('q') or key == 27:  # 'q' or ESC
                     break
                 elif key == ord('1') and self.streams[0]["active"]:
-                    self.main_camera = 0
+                    self.set_main_camera(0)
                     print("Switched main display to Camera 0")
                 elif key == ord('2') and self.streams[1]["active"]:
-                    self.main_camera = 1
+                    self.set_main_camera(1)
                     print("Switched main display to Camera 1")
                 elif key == ord('3') and self.streams[2]["active"]:
-                    self.main_camera = 2
+                    self.set_main_camera(2)
                     print("Switched main display to Camera 2")
                     
         except KeyboardInterrupt:
@@ -258,10 +364,29 @@ def main():
     parser = argparse.ArgumentParser(description="ZED Camera Unified Display")
     parser.add_argument("--jetson-ip", default="192.168.1.254", 
                        help="IP address of the Jetson device (default: 192.168.1.254)")
+    parser.add_argument("--rtcp-port-offset", type=int, default=0,
+                       help="Receive via rtpbin and send RTCP reports to RTP port + offset (sender --adaptive-bitrate)")
+    parser.add_argument("--thumb-port-offset", type=int, default=0,
+                       help="Use the sender's thumbnail streams (RTP port + offset) for sub-displays")
+    parser.add_argument("--sender-http-port", type=int, default=8000,
+                       help="Sender HTTP port for keyframe requests on join/recovery (0 = disabled)")
+    parser.add_argument("--fec", action="store_true",
+                       help="Recover lost packets from the sender's ULPFEC (sender --fec-percentage)")
+    parser.add_argument("--rtx", action="store_true",
+                       help="Request retransmission of lost packets (sender --rtx; needs --rtcp-port-offset)")
+    parser.add_argument("--subscribe", action="store_true",
+                       help="Join the sender's client fan-out over HTTP instead of relying on its --host")
     args = parser.parse_args()
+    if args.rtx and not args.rtcp_port_offset:
+        parser.error("--rtx needs --rtcp-port-offset to send NACKs")
+    if args.fec and args.rtcp_port_offset:
+        print("Warning: --fec receives without rtpbin; no RTCP reports or retransmissions will be sent")
     
     try:
-        app = ZEDStreamReceiver(jetson_ip=args.jetson_ip)
+        app = ZEDStreamReceiver(jetson_ip=args.jetson_ip, rtcp_port_offset=args.rtcp_port_offset,
+                                thumb_port_offset=args.thumb_port_offset,
+                                sender_http_port=args.sender_http_port, subscribe=args.subscribe,
+                                fec=args.fec, rtx=args.rtx)
         app.run()
     except Exception as e:
         print(f"Error: {e}")
@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+Throughput benchmark for the IMU viewer's input path.
+Feeds synthetic ZED IMU printout through IMUBlockParser one line at a time
+(as read_input does) and reports samples per second. The ZED IMU runs at
+up to 400 Hz, so the parser should keep well above 1 kHz on one core.
+Also times QuaternionProcessor per sample (process_imu) against batches
+(process_batch, needs numpy) and checks that both give identical output.
+"""
+
+import argparse
+import contextlib
+import io
+import math
+import time
+
+from simple_server import IMUBlockParser, QuaternionProcessor, np
+
+
+def make_lines(count):
+    lines = []
+    for i in range(count):
+        angle = 0.01 * i
+        q = (0.0, math.sin(angle / 2), 0.0, math.cos(angle / 2))
+        lines.append('IMU:\n')
+        lines.append(f'  Orientation (Ox, Oy, Oz, Ow): [{q[0]:.6f}, {q[1]:.6f}, {q[2]:.6f}, {q[3]:.6f}]\n')
+        lines.append(f'  Acceleration [m/s^2]: [{-0.08 + 0.001 * (i % 7):.4f}, -9.7860, 0.0303]\n')
+        lines.append(f'  Angular velocity [deg/s]: [{0.3 * math.sin(angle):.4f}, 0.1712, 0.1451]\n')
+    return lines
+
+
+def bench_parser(samples):
+    lines = make_lines(samples)
+    parser = IMUBlockParser()
+    parsed = 0
+    start = time.perf_counter()
+    for line in lines:
+        if parser.feed(line) is not None:
+            parsed += 1
+    elapsed = time.perf_counter() - start
+    print(f'parser: {parsed}/{samples} samples in {elapsed * 1000:.1f} ms '
+          f'= {parsed / elapsed:,.0f} samples/s ({elapsed / parsed * 1e6:.2f} us/sample), dropped {parser.dropped}')
+
+
+def make_samples(count):
+    """400 Hz stream: still, then a slow tilt, with gyro spikes and a few zero quaternions."""
+    quats, accels, gyros, timestamps = [], [], [], []
+    for i in range(count):
+        angle = 0.0 if i < count // 3 else 0.002 * (i - count // 3)
+        q = (0.01 * math.sin(0.05 * i), math.sin(angle / 2), 0.0, math.cos(angle / 2))
+        quats.append((0.0, 0.0, 0.0, 0.0) if i % 997 == 500 else q)
+        accels.append((-0.08 + 0.001 * (i % 7), -9.786, 0.0303))
+        spike = 40.0 if i % 1500 in range(1000, 1040) else 0.0
+        gyros.append((0.3 * math.sin(0.01 * i) + spike, 0.1712, 0.1451))
+        timestamps.append(1700000000000.0 + i * 2.5)
+    return quats, accels, gyros, timestamps
+
+
+def bench_processor(samples, batch_size):
+    quats, accels, gyros, timestamps = make_samples(samples)
+    processor = QuaternionProcessor()
+    with contextlib.redirect_stdout(io.StringIO()):
+        start = time.perf_counter()
+        expected = [processor.process_imu(dict(zip('xyzw', q)), dict(zip('xyz', a)), dict(zip('xyz', g)), t)
+                    for q, a, g, t in zip(quats, accels, gyros, timestamps)]
+        elapsed = time.perf_counter() - start
+    print(f'process_imu: {samples / elapsed:,.0f} samples/s ({elapsed / samples * 1e6:.2f} us/sample)')
+    if np is None:
+        print('process_batch: skipped, numpy is not installed')
+        return
+    processor = QuaternionProcessor()
+    results = []
+    with contextlib.redirect_stdout(io.StringIO()):
+        start = time.perf_counter()
+        for i in range(0, samples, batch_size):
+            results.append(processor.process_batch(quats[i:i + batch_size], accels[i:i + batch_size],
+                                                   gyros[i:i + batch_size], timestamps[i:i + batch_size]))
+        elapsed = time.perf_counter() - start
+    print(f'process_batch ({batch_size}): {samples / elapsed:,.0f} samples/s ({elapsed / samples * 1e6:.2f} us/sample)')
+    got = [QuaternionProcessor.sample_at(batch, i) for batch in results for i in range(len(batch['timestamp']))]
+    mismatches = sum(1 for a, b in zip(expected, got) if a != b)
+    print(f'process_batch output: {"identical" if mismatches == 0 else f"{mismatches} samples differ"}')
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the IMU viewer input path')
+    parser.add_argument('--samples', type=int, default=50000, help='Synthetic IMU samples to feed')
+    parser.add_argument('--batch', type=int, default=256, help='Samples per process_batch call')
+    args = parser.parse_args()
+    bench_parser(args.samples)
+    bench_processor(args.samples, args.batch)
+
+
+if __name__ == '__main__':
+    main()
@@ -17,6 +17,45 @@ import struct
 import base64
 import hashlib
 
+try:
+    import numpy as np
+    from numpy.lib.stride_tricks import sliding_window_view
+except ImportError:  # optional, only for QuaternionProcessor.process_batch
+    np = None
+
+
+def normalize4(x, y, z, w):
+    mag = math.sqrt(x * x + y * y + z * z + w * w)
+    if mag == 0:
+        return (0, 0, 0, 1)
+    return (x / mag, y / mag, z / mag, w / mag)
+
+
+def slerp4(q1, q2, t):
+    """SLERP between (x, y, z, w) tuples; the single implementation behind both processor paths."""
+    x1, y1, z1, w1 = q1
+    x2, y2, z2, w2 = q2
+    dot = x1 * x2 + y1 * y2 + z1 * z2 + w1 * w2
+    
+    if dot < 0.0:
+        x2, y2, z2, w2 = -x2, -y2, -z2, -w2
+        dot = -dot
+    
+    if dot > 0.9995:
+        return normalize4(x1 + t * (x2 - x1), y1 + t * (y2 - y1), z1 + t * (z2 - z1), w1 + t * (w2 - w1))
+    
+    theta = math.acos(abs(dot))
+    sin_theta = math.sin(theta)
+    a = math.sin((1.0 - t) * theta) / sin_theta
+    b = math.sin(t * theta) / sin_theta
+    
+    return (a * x1 + b * x2, a * y1 + b * y2, a * z1 + b * z2, a * w1 + b * w2)
+
+
+def quat_dict(q):
+    return {'x': q[0], 'y': q[1], 'z': q[2], 'w': q[3]}
+
+
 class QuaternionProcessor:
     def __init__(self):
         self.smoothing_tau = 0.9  # seconds
@@ -38,9 +77,9 @@ class QuaternionProcessor:
             'debounce': 1.0
         }
         
-        # State tracking
+        # State tracking (state and trigger times are sample times, in seconds)
         self.current_state = 'still'
-        self.state_start_time = time.time()
+        self.state_start_time = None
         self.last_packet_time = time.time()
         
         # Smoothing state
@@ -57,42 +96,26 @@ class QuaternionProcessor:
         
         # Trigger tracking
         self.triggers = {
-            'tilt_mag': {'active': False, 'start_time': 0},
-            'aggressive_mag': {'active': False, 'start_time': 0},
-            'tilt_rate': {'active': False, 'start_time': 0},
-            'aggressive_rate': {'active': False, 'start_time': 0}
+            'tilt_mag': {'active': False, 'start_time': None},
+            'aggressive_mag': {'active': False, 'start_time': None},
+            'tilt_rate': {'active': False, 'start_time': None},
+            'aggressive_rate': {'active': False, 'start_time': None}
         }
         
         self.last_timestamp = None
     
+    # Squares are written x * x throughout: NumPy squares that way, while x**2 goes through
+    # libm pow, which can differ in the last bit and would break batch/per-sample equality
     def normalize(self, q):
-        mag = math.sqrt(q['x']**2 + q['y']**2 + q['z']**2 + q['w']**2)
-        if mag == 0:
-            return {'x': 0, 'y': 0, 'z': 0, 'w': 1}
-        return {k: v/mag for k, v in q.items()}
+        return quat_dict(normalize4(q['x'], q['y'], q['z'], q['w']))
     
     def slerp(self, q1, q2, t):
-        dot = q1['x']*q2['x'] + q1['y']*q2['y'] + q1['z']*q2['z'] + q1['w']*q2['w']
-        
-        if dot < 0.0:
-            q2 = {k: -v for k, v in q2.items()}
-            dot = -dot
-        
-        if dot > 0.9995:
-            result = {k: q1[k] + t * (q2[k] - q1[k]) for k in q1.keys()}
-            return self.normalize(result)
-        
-        theta = math.acos(abs(dot))
-        sin_theta = math.sin(theta)
-        a = math.sin((1.0 - t) * theta) / sin_theta
-        b = math.sin(t * theta) / sin_theta
-        
-        return {k: a * q1[k] + b * q2[k] for k in q1.keys()}
+        return quat_dict(slerp4((q1['x'], q1['y'], q1['z'], q1['w']), (q2['x'], q2['y'], q2['z'], q2['w']), t))
     
     def quat_to_euler(self, q):
         # Roll (x-axis rotation)
         sinr_cosp = 2 * (q['w'] * q['x'] + q['y'] * q['z'])
-        cosr_cosp = 1 - 2 * (q['x']**2 + q['y']**2)
+        cosr_cosp = 1 - 2 * (q['x'] * q['x'] + q['y'] * q['y'])
         roll = math.atan2(sinr_cosp, cosr_cosp)
         
         # Pitch (y-axis rotation)
@@ -104,7 +127,7 @@ class QuaternionProcessor:
         
         # Yaw (z-axis rotation)
         siny_cosp = 2 * (q['w'] * q['z'] + q['x'] * q['y'])
-        cosy_cosp = 1 - 2 * (q['y']**2 + q['z']**2)
+        cosy_cosp = 1 - 2 * (q['y'] * q['y'] + q['z'] * q['z'])
         yaw = math.atan2(siny_cosp, cosy_cosp)
         
         return {
@@ -124,7 +147,7 @@ class QuaternionProcessor:
     def calculate_gyro_rms(self, gyro_data):
         if not gyro_data:
             return 0
-        sum_squares = sum(g['roll']**2 + g['pitch']**2 for g in gyro_data)
+        sum_squares = sum(g['roll'] * g['roll'] + g['pitch'] * g['pitch'] for g in gyro_data)
         return math.sqrt(sum_squares / len(gyro_data))
     
     def update_triggers(self, tilt_mag, gyro_rms, now):
@@ -156,12 +179,12 @@ class QuaternionProcessor:
         trigger = self.triggers[name]
         
         if condition and not trigger['active']:
-            if trigger['start_time'] == 0:
+            if trigger['start_time'] is None:
                 trigger['start_time'] = now
             elif now - trigger['start_time'] >= dwell_time:
                 trigger['active'] = True
         elif not condition:
-            trigger['start_time'] = 0
+            trigger['start_time'] = None
     
     def determine_state(self):
         if self.triggers['aggressive_mag']['active'] or self.triggers['aggressive_rate']['active']:
@@ -171,8 +194,12 @@ class QuaternionProcessor:
         return 'still'
     
     def process_imu(self, quat, accel, gyro, timestamp):
-        now = time.time()
-        self.last_packet_time = now
+        # Filter, dwell and debounce times follow the sample clock (ms), so bursts and
+        # any input rate behave like live data; wall time only feeds signal-lost detection
+        self.last_packet_time = time.time()
+        now = timestamp / 1000
+        if self.state_start_time is None:
+            self.state_start_time = now
         
         # Normalize quaternion
         normalized_quat = self.normalize(quat)
@@ -181,7 +208,8 @@ class QuaternionProcessor:
         if self.smoothed_quat is None:
             self.smoothed_quat = normalized_quat
         else:
-            dt = min((timestamp - (self.last_timestamp or timestamp)) / 1000, 0.1)
+            last = self.last_timestamp if self.last_timestamp is not None else timestamp
+            dt = min(max(timestamp - last, 0) / 1000, 0.1)
             alpha = 1 - math.exp(-dt / self.smoothing_tau)
             self.smoothed_quat = self.slerp(self.smoothed_quat, normalized_quat, alpha)
         
@@ -217,19 +245,203 @@ class QuaternionProcessor:
         )
         
         gyro_rms = self.calculate_gyro_rms(self.gyro_history)
-        tilt_mag = math.sqrt(filtered_roll**2 + filtered_pitch**2)
+        tilt_mag = math.sqrt(filtered_roll * filtered_roll + filtered_pitch * filtered_pitch)
+        
+        self.update_calibration(euler['roll'], euler['pitch'], tilt_mag, gyro_rms)
+        self.update_state(tilt_mag, gyro_rms, now)
+        
+        return {
+            'timestamp': timestamp,
+            'quaternion': self.smoothed_quat,
+            'euler': {
+                'roll': filtered_roll,
+                'pitch': filtered_pitch,
+                'yaw': euler['yaw']
+            },
+            'acceleration': accel,
+            'gyroRMS': gyro_rms,
+            'tiltMagnitude': tilt_mag,
+            'state': self.current_state,
+            'isCalibrating': self.is_calibrating
+        }
+    
+    def process_batch(self, quats, accels, gyros, timestamps):
+        """Process N samples at once: quats (N, 4) xyzw, accels and gyros (N, 3), timestamps (N,) in ms.
+
+        Gives exactly the per-sample path's results (see sample_at) and leaves
+        the same state behind, so both paths can be mixed. Normalization,
+        Euler conversion, median, deadband, gyro RMS and tilt are computed on
+        arrays; the SLERP low-pass and the calibration/trigger state machine
+        are recurrences and step through plain floats. Transcendentals use
+        the math module, since NumPy's SIMD versions differ in the last bit.
+        """
+        quats = np.asarray(quats, dtype=float)
+        gyros = np.asarray(gyros, dtype=float)
+        ts = np.asarray(timestamps, dtype=float)
+        n = len(ts)
+        now = ts / 1000
+        gyro_t = [g['timestamp'] for g in self.gyro_history]
+        if n == 0 or np.any(np.diff(now) < 0) or (gyro_t and gyro_t[-1] > now[0]):
+            # The windowed gyro RMS below assumes sample time never goes back
+            results = [self.process_imu(quat_dict(q), dict(zip('xyz', a)), dict(zip('xyz', g)), t)
+                       for q, a, g, t in zip(quats.tolist(), np.asarray(accels, dtype=float).tolist(), gyros.tolist(), ts.tolist())]
+            return self.batch_from_samples(results)
+        self.last_packet_time = time.time()
+        if self.state_start_time is None:
+            self.state_start_time = float(now[0])
+        
+        # Normalize (a zero quaternion becomes identity)
+        x, y, z, w = quats.T
+        mag = np.sqrt(x * x + y * y + z * z + w * w)
+        zero = mag == 0
+        safe = np.where(zero, 1.0, mag)
+        unit = np.stack([np.where(zero, 0.0, x / safe), np.where(zero, 0.0, y / safe),
+                         np.where(zero, 0.0, z / safe), np.where(zero, 1.0, w / safe)], axis=1)
+        
+        # SLERP low-pass: each output depends on the previous one
+        smoothed = np.empty((n, 4))
+        q = None if self.smoothed_quat is None else tuple(self.smoothed_quat[k] for k in 'xyzw')
+        last = self.last_timestamp
+        tau = self.smoothing_tau
+        for i, (target, t) in enumerate(zip(map(tuple, unit.tolist()), ts.tolist())):
+            if q is None:
+                q = target
+            else:
+                dt = min(max(t - (last if last is not None else t), 0) / 1000, 0.1)
+                q = slerp4(q, target, 1 - math.exp(-dt / tau))
+            last = t
+            smoothed[i] = q
+        self.smoothed_quat = quat_dict(q)
+        self.last_timestamp = last
+        
+        # Euler angles
+        x, y, z, w = smoothed.T
+        roll = np.degrees(np.fromiter(map(math.atan2, (2 * (w * x + y * z)).tolist(), (1 - 2 * (x * x + y * y)).tolist()), float, n))
+        sinp = 2 * (w * y - z * x)
+        pitch = np.fromiter(map(math.asin, np.clip(sinp, -1.0, 1.0).tolist()), float, n)
+        pitch = np.degrees(np.where(np.abs(sinp) >= 1, np.copysign(math.pi / 2, sinp), pitch))
+        yaw = np.degrees(np.fromiter(map(math.atan2, (2 * (w * z + x * y)).tolist(), (1 - 2 * (y * y + z * z)).tolist()), float, n))
+        
+        # Gyro RMS over the last 300 ms (at most 100 samples), summed in order like the per-sample path
+        gyro_t = np.concatenate([gyro_t, now])
+        squares = np.concatenate([[g['roll'] * g['roll'] + g['pitch'] * g['pitch'] for g in self.gyro_history],
+                                  gyros[:, 0] * gyros[:, 0] + gyros[:, 1] * gyros[:, 1]])
+        end = np.arange(len(gyro_t) - n, len(gyro_t))
+        start = np.maximum(np.searchsorted(gyro_t, now - 0.3, side='left'), end - 99)
+        sums = np.zeros(n)
+        for k in range(int((end - start).max()) + 1):
+            idx = start + k
+            inside = idx <= end
+            sums[inside] += squares[idx[inside]]
+        gyro_rms = np.sqrt(sums / (end - start + 1))
+        self.gyro_history = deque(
+            ({'roll': r, 'pitch': p, 'timestamp': t} for r, p, t in zip(
+                np.concatenate([[g['roll'] for g in self.gyro_history], gyros[:, 0]])[start[-1]:].tolist(),
+                np.concatenate([[g['pitch'] for g in self.gyro_history], gyros[:, 1]])[start[-1]:].tolist(),
+                gyro_t[start[-1]:].tolist())),
+            maxlen=100
+        )
         
-        # Handle calibration
+        # Median/deadband/tilt depend on the calibration baseline, which moves when a
+        # calibration completes; work in chunks that end at the earliest possible completion
+        filtered_roll = np.empty(n)
+        filtered_pitch = np.empty(n)
+        tilt = np.empty(n)
+        states = []
+        calibrating = []
+        roll_list, pitch_list, rms_list, now_list = roll.tolist(), pitch.tolist(), gyro_rms.tolist(), now.tolist()
+        i = 0
+        while i < n:
+            stop = min(n, i + (50 - len(self.calibration_samples) if self.is_calibrating else 51))
+            chunk = ((roll[i:stop] - self.baseline_roll, self.roll_history, filtered_roll),
+                     (pitch[i:stop] - self.baseline_pitch, self.pitch_history, filtered_pitch))
+            for values, history, out in chunk:
+                padded = np.concatenate([list(history)[-(self.median_window - 1):], values])
+                prior = len(padded) - len(values)
+                medians = np.empty(len(values))
+                partial = min(len(values), self.median_window - 1 - prior)
+                for k in range(max(partial, 0)):
+                    medians[k] = self.median_filter(padded[:prior + k + 1].tolist())
+                if len(padded) >= self.median_window:
+                    medians[max(partial, 0):] = np.sort(sliding_window_view(padded, self.median_window), axis=1)[:, self.median_window // 2]
+                out[i:stop] = np.where(np.abs(medians) < self.deadband, 0.0, medians)
+            tilt[i:stop] = np.sqrt(filtered_roll[i:stop] * filtered_roll[i:stop] + filtered_pitch[i:stop] * filtered_pitch[i:stop])
+            tilt_list = tilt.tolist() if stop == n else tilt[:stop].tolist()
+            for j in range(i, stop):
+                moved = self.update_calibration(roll_list[j], pitch_list[j], tilt_list[j], rms_list[j])
+                self.update_state(tilt_list[j], rms_list[j], now_list[j])
+                states.append(self.current_state)
+                calibrating.append(self.is_calibrating)
+                if moved:
+                    # Redo the rest of the chunk with the new baseline
+                    stop = j + 1
+                    break
+            for values, history, out in chunk:
+                history.extend(values[:stop - i].tolist())
+            i = stop
+        
+        return {
+            'timestamp': ts,
+            'quaternion': smoothed,
+            'roll': filtered_roll,
+            'pitch': filtered_pitch,
+            'yaw': yaw,
+            'acceleration': np.asarray(accels, dtype=float),
+            'gyroRMS': gyro_rms,
+            'tiltMagnitude': tilt,
+            'state': states,
+            'isCalibrating': calibrating,
+        }
+    
+    @staticmethod
+    def batch_from_samples(results):
+        """Columns of process_batch from a list of process_imu results."""
+        return {
+            'timestamp': np.array([r['timestamp'] for r in results], dtype=float),
+            'quaternion': np.array([[r['quaternion'][k] for k in 'xyzw'] for r in results], dtype=float).reshape(-1, 4),
+            'roll': np.array([r['euler']['roll'] for r in results], dtype=float),
+            'pitch': np.array([r['euler']['pitch'] for r in results], dtype=float),
+            'yaw': np.array([r['euler']['yaw'] for r in results], dtype=float),
+            'acceleration': np.array([[r['acceleration'][k] for k in 'xyz'] for r in results], dtype=float).reshape(-1, 3),
+            'gyroRMS': np.array([r['gyroRMS'] for r in results], dtype=float),
+            'tiltMagnitude': np.array([r['tiltMagnitude'] for r in results], dtype=float),
+            'state': [r['state'] for r in results],
+            'isCalibrating': [r['isCalibrating'] for r in results],
+        }
+    
+    @staticmethod
+    def sample_at(batch, i):
+        """One process_batch row in the process_imu result format."""
+        return {
+            'timestamp': float(batch['timestamp'][i]),
+            'quaternion': quat_dict(batch['quaternion'][i].tolist()),
+            'euler': {
+                'roll': float(batch['roll'][i]),
+                'pitch': float(batch['pitch'][i]),
+                'yaw': float(batch['yaw'][i])
+            },
+            'acceleration': dict(zip('xyz', batch['acceleration'][i].tolist())),
+            'gyroRMS': float(batch['gyroRMS'][i]),
+            'tiltMagnitude': float(batch['tiltMagnitude'][i]),
+            'state': batch['state'][i],
+            'isCalibrating': batch['isCalibrating'][i]
+        }
+    
+    def update_calibration(self, roll, pitch, tilt_mag, gyro_rms):
+        """Auto-calibration step; returns True when it just moved the baseline."""
         if self.is_calibrating:
             self.calibration_samples.append({
-                'roll': euler['roll'], 
-                'pitch': euler['pitch']
+                'roll': roll, 
+                'pitch': pitch
             })
             if len(self.calibration_samples) >= 50:
                 self.finish_calibration()
+                return True
         elif len(self.calibration_samples) == 0 and tilt_mag < 2.0 and gyro_rms < 2.0:
             self.start_calibration()
-        
+        return False
+    
+    def update_state(self, tilt_mag, gyro_rms, now):
         # Update state machine
         self.update_triggers(tilt_mag, gyro_rms, now)
         new_state = self.determine_state()
@@ -241,21 +453,6 @@ class QuaternionProcessor:
             else:
                 self.current_state = new_state
                 self.state_start_time = now
-        
-        return {
-            'timestamp': timestamp,
-            'quaternion': self.smoothed_quat,
-            'euler': {
-                'roll': filtered_roll,
-                'pitch': filtered_pitch,
-                'yaw': euler['yaw']
-            },
-            'acceleration': accel,
-            'gyroRMS': gyro_rms,
-            'tiltMagnitude': tilt_mag,
-            'state': self.current_state,
-            'isCalibrating': self.is_calibrating
-        }
     
     def start_calibration(self):
         self.is_calibrating = True
@@ -385,6 +582,104 @@ class SimpleWebSocketServer:
         
         self.clients -= disconnected
 
+class IMUBlockParser:
+    """Streaming parser for the ZED IMU printout, fed one line at a time.
+
+    A block is an `IMU:` line followed by the Orientation, Acceleration and
+    Angular velocity lines (they may also share one line). feed() returns
+    each complete block exactly once; a block cut short by a new `IMU:`
+    line or holding a malformed field is dropped and counted.
+
+    The sample timestamp (ms) is the producer's when the block carries one
+    with a unit, either after `IMU:` (`IMU: 1712345678901 ms`) or on a
+    `Timestamp [unit]: value` line; otherwise it is the arrival time of the
+    block's `IMU:` line. A producer time without a known unit (s, ms, us,
+    ns) is not guessed at: it is counted in bad_timestamps and ignored.
+    """
+
+    TIME_UNITS_MS = {'s': 1000.0, 'ms': 1.0, 'us': 1e-3, 'ns': 1e-6}
+
+    FIELDS = (
+        ('Orientation', 'quaternion', 'xyzw'),
+        ('Acceleration', 'acceleration', 'xyz'),
+        ('Angular velocity', 'gyro', 'xyz'),
+    )
+
+    def __init__(self):
+        self.stage = -1  # index of the next expected field, -1 while waiting for IMU:
+        self.sample = {}
+        self.arrival_ms = 0.0
+        self.samples = 0
+        self.dropped = 0
+        self.bad_timestamps = 0
+
+    def producer_time_ms(self, text, unit=None):
+        """Milliseconds from the number leading `text`, in `unit` or the word after the number."""
+        tokens = [t.strip(',') for t in text.split(None, 2)]
+        try:
+            value = float(tokens[0]) if tokens else None
+        except ValueError:
+            return None
+        if value is None:
+            return None
+        if unit is None and len(tokens) > 1:
+            unit = tokens[1]
+        if unit not in self.TIME_UNITS_MS:
+            # A device clock can start anywhere, so the scale cannot be inferred from the value
+            if self.bad_timestamps == 0:
+                print(f'Ignoring IMU timestamps without a unit (s, ms, us or ns), got {unit!r}; using arrival time')
+            self.bad_timestamps += 1
+            return None
+        return value * self.TIME_UNITS_MS[unit]
+
+    def feed(self, line, arrival_ms=None):
+        marker = line.find('IMU:')
+        if marker >= 0:
+            if self.stage > 0:
+                self.dropped += 1
+            self.stage = 0
+            line = line[marker + 4:]
+            self.sample = {'timestamp': self.producer_time_ms(line)}
+            self.arrival_ms = arrival_ms if arrival_ms is not None else time.time() * 1000
+        if self.stage >= 0:
+            pos = line.find('Timestamp')
+            if pos >= 0:
+                colon = line.find(':', pos)
+                label = line[pos:colon]
+                unit = label[label.find('[') + 1:label.find(']')] if '[' in label else None
+                stamp = self.producer_time_ms(line[colon + 1:], unit) if colon >= 0 else None
+                if stamp is not None:
+                    self.sample['timestamp'] = stamp
+        while self.stage >= 0:
+            label, key, axes = self.FIELDS[self.stage]
+            pos = line.find(label)
+            if pos < 0:
+                return None
+            # The values are the bracketed list after the label's colon (units use brackets too)
+            start = line.find('[', line.find(':', pos))
+            end = line.find(']', start)
+            try:
+                values = [float(v) for v in line[start + 1:end].split(',')] if start >= 0 and end >= 0 else []
+            except ValueError:
+                values = []
+            if len(values) != len(axes):
+                self.dropped += 1
+                self.stage = -1
+                return None
+            self.sample[key] = dict(zip(axes, values))
+            line = line[end + 1:]
+            self.stage += 1
+            if self.stage == len(self.FIELDS):
+                sample = self.sample
+                if sample['timestamp'] is None:
+                    sample['timestamp'] = self.arrival_ms
+                self.stage = -1
+                self.sample = {}
+                self.samples += 1
+                return sample
+        return None
+
+
 class IMUServer:
     def __init__(self, port=6081):
         self.port = port
@@ -394,55 +689,50 @@ class IMUServer:
         self.last_broadcast = 0
         self.broadcast_interval = 0.05  # 20 Hz
         self.data_queue = queue.Queue()
+        self.max_batch = 256  # samples processed per process_batch call when input backs up
         self.last_processed = None
+        self.parser = IMUBlockParser()
         
     def parse_imu_block(self, text):
-        pattern = r'IMU:\s*Orientation \(Ox, Oy, Oz, Ow\): \[([^\]]+)\]\s*Acceleration \[m/s\^2\]: \[([^\]]+)\]\s*Angular velocity \[deg/s\]: \[([^\]]+)\]'
-        
+        parser = IMUBlockParser()
         matches = []
-        for match in re.finditer(pattern, text):
-            try:
-                orientation = [float(x.strip()) for x in match.group(1).split(',')]
-                acceleration = [float(x.strip()) for x in match.group(2).split(',')]
-                angular_velocity = [float(x.strip()) for x in match.group(3).split(',')]
-                
-                if len(orientation) == 4 and len(acceleration) == 3 and len(angular_velocity) == 3:
-                    matches.append({
-                        'quaternion': {
-                            'x': orientation[0], 'y': orientation[1],
-                            'z': orientation[2], 'w': orientation[3]
-                        },
-                        'acceleration': {
-                            'x': acceleration[0], 'y': acceleration[1], 'z': acceleration[2]
-                        },
-                        'gyro': {
-                            'x': angular_velocity[0], 'y': angular_velocity[1], 'z': angular_velocity[2]
-                        },
-                        'timestamp': int(time.time() * 1000)
-                    })
-            except (ValueError, IndexError):
-                continue
-        
+        for line in text.splitlines():
+            sample = parser.feed(line)
+            if sample is not None:
+                matches.append(sample)
         return matches
     
     def read_input(self):
-        buffer = ""
+        # One line at a time: every block is queued as soon as its last line arrives
         for line in sys.stdin:
-            buffer += line
-            if len(buffer) > 1000:
-                imu_data = self.parse_imu_block(buffer)
-                for data in imu_data:
-                    self.data_queue.put(data)
-                buffer = buffer[-500:]
+            sample = self.parser.feed(line, time.time() * 1000)
+            if sample is not None:
+                self.data_queue.put(sample)
     
     def process_data(self):
         while True:
             try:
                 data = self.data_queue.get(timeout=1.0)
-                processed = self.processor.process_imu(
-                    data['quaternion'], data['acceleration'], 
-                    data['gyro'], data['timestamp']
-                )
+                batch = [data]
+                while len(batch) < self.max_batch:
+                    try:
+                        batch.append(self.data_queue.get_nowait())
+                    except queue.Empty:
+                        break
+                if np is not None and len(batch) > 1:
+                    results = self.processor.process_batch(
+                        [[d['quaternion'][k] for k in 'xyzw'] for d in batch],
+                        [[d['acceleration'][k] for k in 'xyz'] for d in batch],
+                        [[d['gyro'][k] for k in 'xyz'] for d in batch],
+                        [d['timestamp'] for d in batch]
+                    )
+                    processed = self.processor.sample_at(results, -1)
+                else:
+                    for data in batch:
+                        processed = self.processor.process_imu(
+                            data['quaternion'], data['acceleration'], 
+                            data['gyro'], data['timestamp']
+                        )
                 # Store last processed packet for HTTP endpoint
                 self.last_processed = processed
                 
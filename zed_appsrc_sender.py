@@ -2,37 +2,73 @@
 """
 ZED -> GStreamer appsrc -> H.264 RTP sender (Jetson)
 
-Grabs RGBA frames from the ZED SDK and pushes them into a GStreamer pipeline
-built around appsrc, nvvidconv, nvv4l2h264enc, and udpsink.
+Grabs BGRA frames from the ZED SDK and pushes them into a GStreamer pipeline
+built around appsrc, an encoder backend (nvv4l2h264enc on Jetson; x264enc,
+openh264enc or raw RTP elsewhere), and udpsink.
 
 Usage example:
   python3 zed_appsrc_sender.py --host 192.168.1.23 --port 5001 --fps 30 --resolution HD720
 
+Several cameras in one process (one GLib main loop, one capture worker each):
+  python3 zed_appsrc_sender.py --host 192.168.1.39 --camera 59919470:5002 --camera 51553791:5004
+
+Without a camera or pyzed, from a synthetic pattern, image directory or raw RGBA file:
+  python3 zed_appsrc_sender.py --host 127.0.0.1 --source synthetic --duration 30
+  python3 zed_appsrc_sender.py --host 127.0.0.1 --source raw:/data/clip.rgba --source-size 1280x720
+
+Compare encoder backends on a synthetic source (no camera or pyzed needed):
+  python3 zed_appsrc_sender.py --benchmark-encoders --resolution HD720 --fps 30
+
+Frames recovered by FEC at 1/5/10% random loss over loopback:
+  python3 zed_appsrc_sender.py --benchmark-loss 1,5,10 --benchmark-fec-levels 0,10,25,50
+
+Capture fps with positional tracking off, per frame, every 3rd frame and at 10 Hz:
+  python3 zed_appsrc_sender.py --benchmark-pose --pose-every 3 --pose-rate 10
+
+Bytes moved per frame for smaller retrieve sizes, BGRA/GRAY8 and a region of interest:
+  python3 zed_appsrc_sender.py --benchmark-retrieve --retrieve-size 640x360 --pixel-format GRAY8
+
 Notes:
 - macOS cannot run the ZED SDK natively, so this runs on the Jetson and streams
   H.264 to your Mac, which can receive with plain GStreamer.
-- To extend for depth/pose later, add additional streams or a side channel.
+- Pose goes out as multicast records and HTTP; depth (--depth-port-offset) as
+  compressed 16-bit millimetre chunks on its own UDP port.
 """
 
 import argparse
+import os
 import sys
 import signal
 import time
 import threading
 import json
+import hashlib
+import socket
+import struct
+import zlib
+from collections import deque
+from dataclasses import dataclass
+
+import numpy as np
 
 try:
     import pyzed.sl as sl
 except Exception as exc:  # pragma: no cover
-    print("Error: pyzed (ZED SDK Python) not found. Ensure ZED SDK + Python bindings are installed.")
-    print(str(exc))
-    sys.exit(1)
+    # Only fatal once a camera is needed; the encoder benchmark runs without it
+    sl = None
+    PYZED_IMPORT_ERROR = exc
+
+try:
+    import zstandard
+except ImportError:  # optional, only for --depth-codec zstd
+    zstandard = None
 
 try:
     import gi
     gi.require_version("Gst", "1.0")
     gi.require_version("GObject", "2.0")
-    from gi.repository import Gst, GLib
+    gi.require_version("GstVideo", "1.0")
+    from gi.repository import Gst, GLib, GstVideo
 except Exception as exc:  # pragma: no cover
     print("Error: GStreamer Python bindings not found. Install python3-gi and gst packages.")
     print(str(exc))
@@ -41,8 +77,51 @@ except Exception as exc:  # pragma: no cover
 
 def parse_args() -> argparse.Namespace:
     parser = argparse.ArgumentParser(description="ZED to RTP(H.264) sender using appsrc on Jetson")
-    parser.add_argument("--host", required=True, help="Receiver IP (your Mac's IP)")
+    parser.add_argument("--host", default="", help="Receiver IP (your Mac's IP)")
     parser.add_argument("--port", type=int, default=5001, help="UDP port on receiver")
+    parser.add_argument(
+        "--camera",
+        action="append",
+        default=[],
+        metavar="SERIAL:PORT",
+        help="Stream camera SERIAL to receiver PORT; repeat for several cameras in one process (overrides --serial/--port)",
+    )
+    parser.add_argument(
+        "--source",
+        default="zed",
+        help="Frame source: zed, synthetic, images:DIR or raw:FILE (raw RGBA frames); non-ZED sources use a fake pose",
+    )
+    parser.add_argument("--source-size", default="", help="WIDTHxHEIGHT for non-ZED sources (default: --resolution size)")
+    parser.add_argument(
+        "--retrieve-size",
+        default="",
+        help="WIDTHxHEIGHT the SDK scales the image to in retrieve_image (default: camera size); fewer bytes copied and encoded",
+    )
+    parser.add_argument(
+        "--pixel-format",
+        choices=list(PIXEL_FORMATS),
+        default=None,
+        help="Format pushed into appsrc (default: the source's native order, BGRA for the ZED and RGBA otherwise); "
+        "the other 4-channel order costs a channel swap per frame, GRAY8 (VIEW.LEFT_GRAY) moves a quarter of the bytes",
+    )
+    parser.add_argument(
+        "--roi",
+        default="",
+        metavar="X,Y,W,H",
+        help="Stream only this region of the retrieved image (cropped before the copy; W and H rounded down to even)",
+    )
+    parser.add_argument(
+        "--benchmark-retrieve",
+        action="store_true",
+        help="Measure retrieve and copy time and bytes per frame for each size/format/ROI option over --benchmark-frames, then exit",
+    )
+    parser.add_argument("--duration", type=float, default=0.0, help="Stop after this many seconds (0 = run until interrupted)")
+    parser.add_argument(
+        "--profile-cache",
+        default=os.path.join(os.path.expanduser("~"), ".cache", "zed_appsrc_sender", "profiles.json"),
+        help="Last-known-good open profile per camera, tried before the resolution cascade (empty = off)",
+    )
+    parser.add_argument("--ready-timeout", type=float, default=15.0, help="Seconds to wait for a camera's first frame before opening the next")
     parser.add_argument("--fps", type=int, default=30, help="Capture framerate")
     parser.add_argument(
         "--resolution",
@@ -52,11 +131,197 @@ def parse_args() -> argparse.Namespace:
     )
     parser.add_argument("--serial", type=int, default=0, help="Optional camera serial to open (0 = default)")
     parser.add_argument("--bitrate", type=int, default=4000000, help="Encoder bitrate (bps)")
+    parser.add_argument(
+        "--encoder",
+        choices=["auto"] + list(ENCODER_BACKENDS),
+        default="auto",
+        help="Encoder backend; 'auto' picks the first available of " + ", ".join(ENCODER_BACKENDS),
+    )
+    parser.add_argument(
+        "--benchmark-encoders",
+        action="store_true",
+        help="Measure fps, CPU and bytes per frame of each available backend on a synthetic source, then exit",
+    )
+    parser.add_argument(
+        "--gop",
+        type=int,
+        default=0,
+        help="Keyframe interval in frames (0 = one per second); late joiners use POST /keyframe instead of waiting",
+    )
+    parser.add_argument(
+        "--keyframe-min-interval",
+        type=float,
+        default=0.5,
+        help="Minimum seconds between forced keyframes per camera; faster POST /keyframe requests get 429",
+    )
+    parser.add_argument(
+        "--thumb-port-offset",
+        type=int,
+        default=0,
+        help="Also send a low-res, low-fps thumbnail stream on RTP port + offset (0 = off)",
+    )
+    parser.add_argument("--thumb-size", default="320x180", help="Thumbnail stream WIDTHxHEIGHT")
+    parser.add_argument("--thumb-fps", type=int, default=5, help="Thumbnail stream framerate")
+    parser.add_argument("--thumb-bitrate", type=int, default=300000, help="Thumbnail stream bitrate (bps)")
+    parser.add_argument("--benchmark-frames", type=int, default=300, help="Frames per backend for --benchmark-encoders")
     parser.add_argument("--http-port", type=int, default=8000, help="HTTP port to expose pose JSON/UI")
-    return parser.parse_args()
+    parser.add_argument(
+        "--client-hosts",
+        default="",
+        help="Comma-separated hosts POST /clients/add|remove may name with host= besides the caller's own address "
+        "(* = any); by default a caller can only add or remove itself",
+    )
+    parser.add_argument(
+        "--adaptive-bitrate",
+        action="store_true",
+        help="Send through rtpbin and adapt encoder bitrate from RTCP receiver reports (receiver must use rtpbin too)",
+    )
+    parser.add_argument("--rtcp-port-offset", type=int, default=1000, help="RTCP port = RTP port + offset (same on both ends)")
+    parser.add_argument("--min-bitrate", type=int, default=500000, help="Adaptive bitrate lower bound (bps)")
+    parser.add_argument("--max-bitrate", type=int, default=0, help="Adaptive bitrate upper bound (bps, 0 = --bitrate)")
+    parser.add_argument("--bitrate-step-up", type=int, default=250000, help="Additive increase per clean interval (bps)")
+    parser.add_argument("--bitrate-decrease", type=float, default=0.75, help="Multiplicative decrease on loss/jitter")
+    parser.add_argument("--loss-high", type=float, default=0.02, help="Fraction lost that triggers a decrease")
+    parser.add_argument("--loss-low", type=float, default=0.005, help="Fraction lost below which bitrate may increase")
+    parser.add_argument("--jitter-high-ms", type=float, default=30.0, help="Receiver jitter (ms) that triggers a decrease")
+    parser.add_argument(
+        "--fec-percentage",
+        type=int,
+        default=0,
+        help="ULPFEC overhead in percent of media packets, sent inside RED (0 = off; receivers need --fec)",
+    )
+    parser.add_argument(
+        "--rtx",
+        action="store_true",
+        help="Retransmit packets NACKed by receivers (RFC 4588); sends through rtpbin like --adaptive-bitrate",
+    )
+    parser.add_argument("--rtx-time-ms", type=int, default=500, help="How long sent packets are kept for retransmission")
+    parser.add_argument(
+        "--benchmark-loss",
+        default="",
+        help="Comma-separated random loss percentages to inject over loopback, reporting intact frames per FEC level, then exit",
+    )
+    parser.add_argument(
+        "--benchmark-fec-levels", default="0,10,25,50", help="FEC percentages compared by --benchmark-loss"
+    )
+    parser.add_argument("--abr-interval", type=float, default=1.0, help="Seconds between bitrate decisions")
+    parser.add_argument("--abr-log", default="", help="CSV file for the bitrate adjustment time series ('' = stdout only)")
+    parser.add_argument(
+        "--pose-multicast",
+        default="239.255.42.1:5600",
+        metavar="GROUP:PORT",
+        help="UDP multicast group/base port for per-frame pose records ('' = off)",
+    )
+    parser.add_argument(
+        "--pose-decimations",
+        default="1,6",
+        help="Comma-separated decimation factors; factor i is sent on base port + i (1 = every grabbed frame)",
+    )
+    parser.add_argument("--pose-ttl", type=int, default=1, help="Multicast TTL for pose records")
+    parser.add_argument(
+        "--no-pose-tracking",
+        action="store_true",
+        help="Video only: do not enable positional tracking (no pose, no tracking depth on the Jetson)",
+    )
+    parser.add_argument(
+        "--pose-rate",
+        type=float,
+        default=0.0,
+        help="Read the pose on its own thread at this rate in Hz instead of in the capture loop (0 = in the capture loop)",
+    )
+    parser.add_argument("--pose-every", type=int, default=1, help="In the capture loop, read the pose of every Nth grabbed frame")
+    parser.add_argument(
+        "--benchmark-pose",
+        action="store_true",
+        help="Grab --benchmark-frames frames per pose mode (off, every frame, --pose-every, --pose-rate) and report fps, then exit",
+    )
+    parser.add_argument("--pose-history-seconds", type=float, default=10.0, help="Seconds of pose history kept for /pose/at and /pose/since")
+    parser.add_argument(
+        "--copy-mode",
+        choices=["pool", "legacy"],
+        default="pool",
+        help="Frame handoff: 'pool' copies once into recycled GstBuffers, 'legacy' uses tobytes()+fill (two copies)",
+    )
+    parser.add_argument("--pool-size", type=int, default=12, help="Number of preallocated GstBuffers in the frame pool")
+    parser.add_argument("--ring-size", type=int, default=4, help="Frames buffered between the capture and push threads")
+    parser.add_argument(
+        "--drop-policy",
+        choices=["drop-oldest", "drop-newest"],
+        default="drop-oldest",
+        help="What to discard when the capture->push ring is full",
+    )
+    parser.add_argument(
+        "--backpressure",
+        choices=["skip", "wait", "off"],
+        default="skip",
+        help="On appsrc enough-data: 'skip' frames before retrieve, 'wait' to slow capture, 'off' to push blindly",
+    )
+    parser.add_argument(
+        "--record-dir",
+        default="",
+        help="Keep a rolling recording of each camera's H.264 (no re-encode) in DIR/<port>/ (empty = off)",
+    )
+    parser.add_argument("--record-format", choices=["mkv", "mp4"], default="mkv", help="Recording segment container")
+    parser.add_argument("--record-segment-seconds", type=int, default=60, help="Length of each recording segment")
+    parser.add_argument("--record-max-files", type=int, default=10, help="Segments kept per camera (0 = no limit)")
+    parser.add_argument("--record-max-mb", type=int, default=0, help="Disk budget per camera in MB (0 = no limit)")
+    parser.add_argument(
+        "--depth-port-offset",
+        type=int,
+        default=0,
+        help="Send 16-bit millimetre depth to --host on RTP port + offset (0 = off, camera runs without depth)",
+    )
+    parser.add_argument("--depth-size", default="320x180", help="Depth map WIDTHxHEIGHT retrieved from the SDK")
+    parser.add_argument("--depth-fps", type=float, default=10.0, help="Depth maps per second (depth is computed only for those grabs)")
+    parser.add_argument(
+        "--depth-mode", choices=["PERFORMANCE", "QUALITY", "ULTRA", "NEURAL"], default="PERFORMANCE", help="ZED depth mode"
+    )
+    parser.add_argument("--depth-codec", choices=["png", "zstd"], default="png", help="Lossless depth compression")
+    parser.add_argument("--depth-level", type=int, default=1, help="Compression level (zlib 1-9 / zstd 1-22)")
+    parser.add_argument("--appsrc-max-frames", type=int, default=2, help="appsrc queue limit, in frames")
+    parser.add_argument(
+        "--no-capture-ts-ext",
+        action="store_true",
+        help="Do not add the ONVIF RTP header extension carrying each frame's absolute capture time",
+    )
+    parser.add_argument("--metrics-csv", default="", help="Append the /metrics samples to this CSV every --metrics-interval")
+    parser.add_argument("--metrics-interval", type=float, default=10.0, help="Seconds between --metrics-csv rows")
+    parser.add_argument("--timer-window", type=int, default=1024, help="Samples per stage kept for the p50/p95/p99 timers")
+    parser.add_argument("--stats-interval", type=float, default=5.0, help="Seconds between copy/throughput reports (0 = off)")
+    parser.add_argument(
+        "--max-pipeline-restarts",
+        type=int,
+        default=0,
+        help="Stop a camera after this many back-to-back pipeline rebuilds on errors (0 = keep rebuilding)",
+    )
+    args = parser.parse_args()
+    if not args.host and not (args.benchmark_encoders or args.benchmark_loss or args.benchmark_pose or args.benchmark_retrieve):
+        parser.error("--host is required")
+    if args.depth_port_offset and args.depth_codec == "zstd" and zstandard is None:
+        parser.error("--depth-codec zstd needs the zstandard package (pip install zstandard)")
+    return args
+
+
+@dataclass
+class CameraSpec:
+    serial: int
+    port: int
+
+
+def parse_camera_specs(args: argparse.Namespace) -> list:
+    if not args.camera:
+        return [CameraSpec(args.serial, args.port)]
+    specs = []
+    for item in args.camera:
+        try:
+            serial, port = item.split(":", 1)
+            specs.append(CameraSpec(int(serial), int(port)))
+        except ValueError:
+            raise SystemExit(f"Invalid --camera '{item}', expected SERIAL:PORT")
+    return specs
 
 
-def resolution_choice_to_enum(choice: str) -> sl.RESOLUTION:
+def resolution_choice_to_enum(choice: str) -> "sl.RESOLUTION":
     if choice == "VGA":
         return sl.RESOLUTION.VGA
     if choice == "HD720":
@@ -68,240 +333,2989 @@ def resolution_choice_to_enum(choice: str) -> sl.RESOLUTION:
     return sl.RESOLUTION.HD720
 
 
-def build_pipeline(host: str, port: int, width: int, height: int, fps: int, bitrate: int) -> Gst.Pipeline:
-    # We push RGBA from CPU into appsrc; nvvidconv converts to NV12 in NVMM; nvv4l2h264enc encodes; RTP payload; UDP send
-    pipeline_str = (
-        f"appsrc name=src is-live=true format=time do-timestamp=true "
-        f"caps=\"video/x-raw,format=RGBA,width={width},height={height},framerate={fps}/1\" "
-        f"! queue max-size-buffers=4 leaky=downstream "
-        f"! nvvidconv ! video/x-raw(memory:NVMM),format=NV12 "
-        f"! nvv4l2h264enc insert-sps-pps=true iframeinterval={fps} idrinterval={fps} bitrate={bitrate} preset-level=1 "
-        f"! h264parse config-interval=-1 "
-        f"! rtph264pay pt=96 "
-        f"! udpsink host={host} port={port} sync=false async=false"
-    )
+class CopyStats:
+    """Counts frame copies and bytes moved on the Python side of the handoff."""
 
-    pipeline = Gst.parse_launch(pipeline_str)
-    if not isinstance(pipeline, Gst.Pipeline):
-        raise RuntimeError("Failed to create GStreamer pipeline")
-    return pipeline
+    def __init__(self):
+        self.frames = 0
+        self.copies = 0
+        self.bytes_copied = 0
+        self.pool_misses = 0
+        self._window_start = time.monotonic()
+        self._window_frames = 0
+        self._window_bytes = 0
 
+    def record(self, nbytes: int, copies: int) -> None:
+        self.frames += 1
+        self.copies += copies
+        self.bytes_copied += nbytes * copies
+        self._window_frames += 1
+        self._window_bytes += nbytes * copies
 
-def main() -> int:
-    args = parse_args()
+    def report(self, interval: float):
+        """Return the summary line for the last window once `interval` has elapsed, else None."""
+        now = time.monotonic()
+        elapsed = now - self._window_start
+        if interval <= 0 or elapsed < interval:
+            return None
+        line = self.summary(elapsed, self._window_frames, self._window_bytes)
+        self._window_start = now
+        self._window_frames = 0
+        self._window_bytes = 0
+        return line
 
-    Gst.init(None)
-    stop_requested = False
+    def summary(self, elapsed=None, frames=None, nbytes=None) -> str:
+        frames = self.frames if frames is None else frames
+        nbytes = self.bytes_copied if nbytes is None else nbytes
+        copies_per_frame = self.copies / self.frames if self.frames else 0.0
+        mb_per_frame = nbytes / frames / 1e6 if frames else 0.0
+        line = f"[copy] frames={frames} copies/frame={copies_per_frame:.2f} MB/frame={mb_per_frame:.2f}"
+        if elapsed:
+            line += f" fps={frames / elapsed:.1f} MB/s={nbytes / elapsed / 1e6:.1f}"
+        return line + f" pool_misses={self.pool_misses}"
 
-    def handle_sigint(signum, frame):
-        nonlocal stop_requested
-        stop_requested = True
 
-    signal.signal(signal.SIGINT, handle_sigint)
-    signal.signal(signal.SIGTERM, handle_sigint)
+class FrameBufferPool:
+    """Preallocated GstBuffers recycled across frames.
 
-    # ZED initialization with resolution fallback
-    requested_res = resolution_choice_to_enum(args.resolution)
-    fallback_order = [requested_res, sl.RESOLUTION.HD720, sl.RESOLUTION.HD1080, sl.RESOLUTION.VGA, sl.RESOLUTION.HD2K]
-    tried = set()
+    Each frame is copied once, straight from the sl.Mat view into the mapped
+    GstBuffer memory. A buffer is checked out until release() is called (after
+    it was pushed or dropped), and goes back to the pool once the pipeline
+    drops its references too (the pool then holds the only one). If every
+    buffer is still in flight a fresh one is allocated and counted as a miss.
+    """
 
-    cam = sl.Camera()
-    last_status = None
-    opened = False
-    for res in fallback_order:
-        if res in tried:
-            continue
-        tried.add(res)
-        init_params = sl.InitParameters()
-        init_params.camera_resolution = res
-        init_params.camera_fps = args.fps
-        init_params.depth_mode = sl.DEPTH_MODE.NONE  # video-only for now; can enable later
-        init_params.coordinate_units = sl.UNIT.METER
-        if args.serial:
-            init_params.set_from_serial_number(args.serial)
+    def __init__(self, frame_size: int, count: int, stats: CopyStats):
+        self.frame_size = frame_size
+        self.stats = stats
+        self._buffers = [Gst.Buffer.new_allocate(None, frame_size, None) for _ in range(max(1, count))]
+        self._checked_out = set()
+        self._lock = threading.Lock()
+        self._next = 0
 
-        status = cam.open(init_params)
-        last_status = status
-        if status == sl.ERROR_CODE.SUCCESS:
-            # Enable positional tracking (no area memory file for now)
-            try:
-                tracking_params = sl.PositionalTrackingParameters()
-                cam.enable_positional_tracking(tracking_params)
-            except Exception as e:
-                print(f"Warning: failed to enable positional tracking: {e}")
-            opened = True
-            break
-        # If resolution invalid, try again with a safer fps as well
-        if status == sl.ERROR_CODE.INVALID_RESOLUTION and args.fps > 15:
-            init_params.camera_fps = 15
-            status = cam.open(init_params)
-            last_status = status
-            if status == sl.ERROR_CODE.SUCCESS:
-                try:
-                    tracking_params = sl.PositionalTrackingParameters()
-                    cam.enable_positional_tracking(tracking_params)
-                except Exception as e:
-                    print(f"Warning: failed to enable positional tracking: {e}")
-                opened = True
-                break
-
-    if not opened:
-        print(f"Failed to open ZED: {repr(last_status)}")
-        return 2
+    def _acquire(self) -> Gst.Buffer:
+        with self._lock:
+            for _ in range(len(self._buffers)):
+                idx = self._next
+                self._next = (self._next + 1) % len(self._buffers)
+                buf = self._buffers[idx]
+                if idx not in self._checked_out and buf.mini_object.refcount == 1:
+                    self._checked_out.add(idx)
+                    return buf
+        self.stats.pool_misses += 1
+        return Gst.Buffer.new_allocate(None, self.frame_size, None)
 
-    cam_info = cam.get_camera_information()
-    try:
-        # SDK >= 4.x/5.x: resolution is under camera_configuration
-        res_obj = cam_info.camera_configuration.resolution
-        width = res_obj.width
-        height = res_obj.height
-    except Exception:
-        # Fallback for older SDKs (if any)
-        width = 1280
-        height = 720
-    fps = args.fps
-
-    pipeline = build_pipeline(args.host, args.port, width, height, fps, args.bitrate)
-    appsrc = pipeline.get_by_name("src")
-    if appsrc is None:
-        print("Failed to get appsrc element")
-        cam.close()
-        return 3
+    def release(self, buf: Gst.Buffer) -> None:
+        with self._lock:
+            for idx in self._checked_out:
+                if self._buffers[idx] is buf:
+                    self._checked_out.discard(idx)
+                    return
 
-    # Pre-allocate buffers/holders
-    img = sl.Mat()
-    runtime_params = sl.RuntimeParameters()
-    pose = sl.Pose()
-
-    # Shared pose state for HTTP server
-    latest_pose = {"timestamp_ns": 0, "translation_m": [0.0, 0.0, 0.0], "orientation_xyzw": [0.0, 0.0, 0.0, 1.0], "status": "UNKNOWN"}
-    pose_lock = threading.Lock()
-
-    # HTTP server to expose pose and a minimal overlay page
-    from http.server import BaseHTTPRequestHandler, HTTPServer
-
-    def run_http_server():
-        class Handler(BaseHTTPRequestHandler):
-            def do_GET(self):
-                if self.path == "/pose.json":
-                    with pose_lock:
-                        body = json.dumps(latest_pose).encode("utf-8")
-                    self.send_response(200)
-                    self.send_header("Content-Type", "application/json")
-                    self.send_header("Content-Length", str(len(body)))
-                    self.end_headers()
-                    self.wfile.write(body)
-                else:
-                    # Minimal overlay page polling pose
-                    html = (
-                        "<!doctype html><html><head><meta charset='utf-8'><title>ZED Pose</title>"
-                        "<style>body{font-family:sans-serif;margin:16px}pre{background:#f4f4f4;padding:12px;border-radius:6px}</style>"
-                        "</head><body><h2>ZED Pose (HTTP :8000)</h2>"
-                        "<div>Polling /pose.json at 5 Hz</div>"
-                        "<pre id='out'>waiting...</pre>"
-                        "<script>async function tick(){try{const r=await fetch('/pose.json');const j=await r.json();document.getElementById('out').textContent=JSON.stringify(j,null,2);}catch(e){document.getElementById('out').textContent=String(e);}finally{setTimeout(tick,200);} } tick();</script>"
-                        "</body></html>"
-                    ).encode("utf-8")
-                    self.send_response(200)
-                    self.send_header("Content-Type", "text/html; charset=utf-8")
-                    self.send_header("Content-Length", str(len(html)))
-                    self.end_headers()
-                    self.wfile.write(html)
-
-            def log_message(self, format, *args):
-                return  # quiet
-
-        httpd = HTTPServer(("0.0.0.0", args.http_port), Handler)
+    def copy_frame(self, frame: np.ndarray) -> Gst.Buffer:
+        buf = self._acquire()
+        ok, info = buf.map(Gst.MapFlags.WRITE)
+        if not ok:
+            raise RuntimeError("Failed to map GstBuffer for writing")
+        try:
+            dst = np.ndarray(frame.shape, dtype=frame.dtype, buffer=info.data)
+            np.copyto(dst, frame)
+        finally:
+            buf.unmap(info)
+        self.stats.record(self.frame_size, 1)
+        return buf
+
+
+@dataclass
+class CapturedFrame:
+    buffer: Gst.Buffer
+    index: int
+    capture_ns: int
+
+
+class FrameRing:
+    """Bounded hand-off between the capture and push threads.
+
+    put() never blocks the capture thread: when the ring is full either the
+    oldest queued frame or the incoming one is discarded, per drop policy.
+    """
+
+    def __init__(self, capacity: int, policy: str = "drop-oldest"):
+        self.capacity = max(1, capacity)
+        self.policy = policy
+        self._items = deque()
+        self._cond = threading.Condition()
+        self._closed = False
+        self.dropped = 0
+        self.max_depth = 0
+
+    @property
+    def depth(self) -> int:
+        return len(self._items)
+
+    def put(self, frame: CapturedFrame):
+        """Queue a frame; returns the frame discarded to make room, if any."""
+        with self._cond:
+            discarded = None
+            if len(self._items) >= self.capacity:
+                self.dropped += 1
+                if self.policy == "drop-newest":
+                    return frame
+                discarded = self._items.popleft()
+            self._items.append(frame)
+            self.max_depth = max(self.max_depth, len(self._items))
+            self._cond.notify()
+            return discarded
+
+    def get(self, timeout: float):
+        with self._cond:
+            if not self._items and not self._closed:
+                self._cond.wait(timeout)
+            return self._items.popleft() if self._items else None
+
+    def drain(self):
+        with self._cond:
+            items = list(self._items)
+            self._items.clear()
+            return items
+
+    def close(self) -> None:
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+
+    def summary(self) -> str:
+        return f"[ring] depth={self.depth}/{self.capacity} max_depth={self.max_depth} dropped={self.dropped} policy={self.policy}"
+
+
+class Backpressure:
+    """Follows appsrc need-data/enough-data so capture backs off before retrieve.
+
+    admit() is called right after grab: when appsrc has signalled enough-data
+    (or current-level-bytes is at the limit) the frame is either skipped,
+    before the retrieve-and-copy, or capture waits up to one frame period
+    for need-data.
+    """
+
+    def __init__(self, appsrc, max_bytes: int, mode: str, frame_period: float):
+        self.max_bytes = max_bytes
+        self.mode = mode
+        self.frame_period = frame_period
+        self.skipped = 0
+        self.waited = 0
+        self.enough_data_events = 0
+        self._can_push = threading.Event()
+        self.attach(appsrc)
+
+    def attach(self, appsrc) -> None:
+        """Follow a (new) appsrc; counters carry over across pipeline rebuilds."""
+        self.appsrc = appsrc
+        self._can_push.set()
+        if self.mode != "off":
+            appsrc.connect("need-data", self._on_need_data)
+            appsrc.connect("enough-data", self._on_enough_data)
+
+    def _on_need_data(self, src, length):
+        self._can_push.set()
+
+    def _on_enough_data(self, src):
+        self.enough_data_events += 1
+        self._can_push.clear()
+
+    def level_bytes(self) -> int:
         try:
-            httpd.serve_forever()
+            return int(self.appsrc.get_property("current-level-bytes"))
         except Exception:
-            pass
+            return 0
 
-    http_thread = threading.Thread(target=run_http_server, daemon=True)
-    http_thread.start()
+    def congested(self) -> bool:
+        return not self._can_push.is_set() or self.level_bytes() >= self.max_bytes
 
-    # Start pipeline
-    bus = pipeline.get_bus()
-    pipeline.set_state(Gst.State.PLAYING)
+    def admit(self) -> bool:
+        if self.mode == "off" or not self.congested():
+            return True
+        if self.mode == "wait":
+            self.waited += 1
+            if self._can_push.wait(self.frame_period) and self.level_bytes() < self.max_bytes:
+                return True
+        self.skipped += 1
+        return False
 
-    frame_count = 0
-    start_time_ns = time.time_ns()
-    frame_duration_ns = int(1_000_000_000 // max(1, fps))
+    def summary(self) -> str:
+        return (
+            f"[backpressure] mode={self.mode} level_bytes={self.level_bytes()}/{self.max_bytes} "
+            f"enough_data={self.enough_data_events} waits={self.waited} skipped={self.skipped}"
+        )
+
+
+class RateMeter:
+    """Windowed counters for the achieved vs requested frame rate."""
+
+    def __init__(self, requested_fps: int, names):
+        self.requested_fps = requested_fps
+        self.totals = {name: 0 for name in names}
+        self._window = dict(self.totals)
+        self._window_start = time.monotonic()
+
+    def count(self, name: str) -> None:
+        self.totals[name] += 1
+        self._window[name] += 1
+
+    def summary(self) -> str:
+        now = time.monotonic()
+        elapsed = max(now - self._window_start, 1e-6)
+        rates = " ".join(f"{name}={n / elapsed:.1f}" for name, n in self._window.items())
+        self._window = {name: 0 for name in self._window}
+        self._window_start = now
+        return f"[rate] requested={self.requested_fps} {rates} fps"
+
+
+class StageTimers:
+    """Rolling per-stage durations for percentiles, plus lifetime count and sum.
+
+    Each stage is written by a single thread, so recording is one array store
+    and two adds; percentiles are only computed when metrics are read.
+    """
+
+    def __init__(self, names, window: int = 1024):
+        self.window = max(16, window)
+        self._samples = {name: np.zeros(self.window, dtype=np.int64) for name in names}
+        self.count = {name: 0 for name in names}
+        self.sum_ns = {name: 0 for name in names}
+
+    def record(self, name: str, ns: int) -> None:
+        n = self.count[name]
+        self._samples[name][n % self.window] = ns
+        self.count[name] = n + 1
+        self.sum_ns[name] += ns
+
+    def percentiles(self, name: str, quantiles=(0.5, 0.95, 0.99)):
+        """Quantiles of the last `window` samples in seconds (zeros before the first sample)."""
+        filled = min(self.count[name], self.window)
+        if not filled:
+            return [0.0 for _ in quantiles]
+        values = np.quantile(self._samples[name][:filled], quantiles)
+        return [float(v) / 1e9 for v in values]
+
+    def summary(self) -> str:
+        parts = []
+        for name in self._samples:
+            p50, p95, p99 = self.percentiles(name)
+            parts.append(f"{name}={p50 * 1e3:.2f}/{p95 * 1e3:.2f}/{p99 * 1e3:.2f}")
+        return "[stages ms p50/p95/p99] " + " ".join(parts)
+
+
+def render_prometheus(samples) -> str:
+    """Prometheus text format from (name, type, help, labels, value) samples, grouped by metric name."""
+    families = {}
+    for name, kind, help_text, labels, value in samples:
+        # A summary's _sum and _count belong to its family
+        base = name.rsplit("_", 1)[0] if name.endswith(("_sum", "_count")) else name
+        if base not in families or families[base][0] != "summary":
+            base = name
+        family = families.setdefault(base, (kind, help_text, []))
+        family[2].append((name, labels, value))
+    lines = []
+    for base, (kind, help_text, values) in families.items():
+        lines.append(f"# HELP {base} {help_text}")
+        lines.append(f"# TYPE {base} {kind}")
+        for name, labels, value in values:
+            label_text = ",".join(f'{key}="{val}"' for key, val in labels.items())
+            lines.append(f"{name}{{{label_text}}} {value}")
+    return "\n".join(lines) + "\n"
 
-    try:
-        while not stop_requested:
-            if cam.grab(runtime_params) != sl.ERROR_CODE.SUCCESS:
-                # Keep looping; could add sleep(0) to yield
-                continue
 
-            cam.retrieve_image(img, sl.VIEW.LEFT, sl.MEM.CPU)
-            np_img = img.get_data()  # H x W x 4 (RGBA), uint8
-            # Ensure C-contiguous bytes
-            frame_bytes = memoryview(np_img).tobytes()
+class MetricsCsvLog:
+    """Appends every metric sample as a row: time, metric, labels, value."""
 
-            # Update pose (WORLD frame)
+    def __init__(self, path: str):
+        new = not os.path.exists(path) or os.path.getsize(path) == 0
+        self.file = open(path, "a")
+        if new:
+            self.file.write("time_s,metric,labels,value\n")
+
+    def write(self, samples) -> None:
+        now = f"{time.time():.3f}"
+        for name, _, _, labels, value in samples:
+            label_text = ";".join(f"{key}={val}" for key, val in labels.items())
+            self.file.write(f"{now},{name},{label_text},{value}\n")
+        self.file.flush()
+
+    def close(self) -> None:
+        self.file.close()
+
+
+# Binary pose record, little endian (48 bytes):
+#   magic "ZP", version, tracking state, camera serial, grab sequence,
+#   capture time (ns, same value as the video buffer PTS), translation xyz (m), quaternion xyzw
+POSE_RECORD = struct.Struct("<2sBBIIQ3f4f")
+POSE_MAGIC = b"ZP"
+POSE_VERSION = 1
+
+
+class PosePublisher:
+    """Pushes one pose record per pose sample (every grabbed frame by default) to a UDP multicast group.
+
+    Every decimation factor gets its own port (base port + index), so a
+    consumer picks full or reduced rate just by which port it binds; nothing
+    is requested per sample. Sends are non-blocking and never stall capture.
+    """
+
+    def __init__(self, group: str, base_port: int, decimations, ttl: int = 1):
+        self.targets = [(max(1, every), (group, base_port + i)) for i, every in enumerate(decimations)]
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM, socket.IPPROTO_UDP)
+        self.sock.setsockopt(socket.IPPROTO_IP, socket.IP_MULTICAST_TTL, ttl)
+        self.sock.setblocking(False)
+        self.sent = 0
+        self.send_errors = 0
+
+    def publish(self, serial: int, seq: int, sample: int, capture_ns: int, translation, orientation, state: int) -> None:
+        """`seq` is the grab the pose belongs to; decimation counts pose samples (`sample`)."""
+        record = POSE_RECORD.pack(POSE_MAGIC, POSE_VERSION, state & 0xFF, serial & 0xFFFFFFFF, seq & 0xFFFFFFFF, capture_ns, *translation, *orientation)
+        for every, addr in self.targets:
+            if sample % every:
+                continue
             try:
-                tracking_state = cam.get_position(pose, sl.REFERENCE_FRAME.WORLD)
-                # translation [x,y,z] in meters
-                try:
-                    t = pose.get_translation().get()
-                except Exception:
-                    t = [0.0, 0.0, 0.0]
-                # orientation quaternion [x,y,z,w]
-                try:
-                    q = pose.get_orientation().get()
-                except Exception:
-                    q = [0.0, 0.0, 0.0, 1.0]
-                with pose_lock:
-                    latest_pose["timestamp_ns"] = time.time_ns()
-                    latest_pose["translation_m"] = [float(t[0]), float(t[1]), float(t[2])] if len(t) >= 3 else [0.0, 0.0, 0.0]
-                    latest_pose["orientation_xyzw"] = [float(q[0]), float(q[1]), float(q[2]), float(q[3])] if len(q) >= 4 else [0.0, 0.0, 0.0, 1.0]
-                    latest_pose["status"] = str(tracking_state)
-            except Exception as e:
-                # Non-fatal; keep streaming video
-                pass
+                self.sock.sendto(record, addr)
+                self.sent += 1
+            except OSError:
+                self.send_errors += 1
 
-            buf = Gst.Buffer.new_allocate(None, len(frame_bytes), None)
-            # Timestamping
-            pts = start_time_ns + frame_count * frame_duration_ns
-            buf.pts = pts
-            buf.dts = pts
-            buf.duration = frame_duration_ns
-            # Write frame bytes into buffer
+    def describe(self) -> str:
+        return ", ".join(f"1/{every} -> {host}:{port}" for every, (host, port) in self.targets)
+
+
+def slerp_quat(q0: np.ndarray, q1: np.ndarray, u: float) -> np.ndarray:
+    """Spherical linear interpolation between unit quaternions (x, y, z, w)."""
+    dot = float(np.dot(q0, q1))
+    if dot < 0.0:
+        q1 = -q1
+        dot = -dot
+    if dot > 0.9995:
+        q = q0 + u * (q1 - q0)
+        return q / np.linalg.norm(q)
+    theta = np.arccos(dot)
+    sin_theta = np.sin(theta)
+    return (np.sin((1.0 - u) * theta) * q0 + np.sin(u * theta) * q1) / sin_theta
+
+
+class PoseSampler:
+    """Reads the source pose off the capture thread at a fixed rate.
+
+    The capture thread only records (capture_ns, seq) of each grab, a single
+    reference swap with no lock. Every 1/rate s the sampler reads the pose of
+    the newest grab and hands (capture_ns, seq, pose) to `on_pose`; the pose
+    is stamped with the source's own pose time, so a grab that lands while
+    the pose is read cannot mislabel it.
+    """
+
+    def __init__(self, source, rate_hz: float, on_pose, name: str = "zed-pose"):
+        self.source = source
+        self.period = 1.0 / rate_hz
+        self.on_pose = on_pose
+        self.last_grab = None  # (capture_ns, seq); written by the capture thread only
+        self.samples = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name=name, daemon=True)
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def note_grab(self, capture_ns: int, seq: int) -> None:
+        self.last_grab = (capture_ns, seq)
+
+    def _run(self):
+        last_ns = 0
+        next_t = time.monotonic()
+        while not self._stop.wait(max(0.0, next_t - time.monotonic())):
+            next_t = max(next_t + self.period, time.monotonic())
+            grab = self.last_grab
+            if grab is None or grab[0] == last_ns:
+                continue
             try:
-                buf.fill(0, frame_bytes)
-            except Exception as e:
-                print(f"Warning: failed to fill GstBuffer: {e}; skipping frame")
+                pose = self.source.pose()
+            except Exception:
                 continue
+            pose_ns = self.source.pose_ns() or grab[0]
+            if pose_ns == last_ns:
+                continue
+            latest = self.last_grab
+            seq = latest[1] if latest[0] == pose_ns else grab[1]
+            last_ns = pose_ns
+            self.samples += 1
+            self.on_pose(pose_ns, seq, pose)
 
-            ret = appsrc.emit("push-buffer", buf)
-            if ret != Gst.FlowReturn.OK:
-                print(f"GStreamer push-buffer returned {ret}; stopping")
-                break
+    def close(self) -> None:
+        self._stop.set()
+        if self._thread.is_alive():
+            self._thread.join(timeout=1.0)
 
-            frame_count += 1
 
-            # Poll bus for errors to exit promptly
-            msg = bus.timed_pop_filtered(0, Gst.MessageType.ERROR | Gst.MessageType.EOS)
-            if msg is not None:
-                if msg.type == Gst.MessageType.ERROR:
-                    err, dbg = msg.parse_error()
-                    print(f"Pipeline error: {err}, debug: {dbg}")
-                else:
-                    print("Pipeline EOS")
-                break
-    finally:
-        try:
-            appsrc.emit("end-of-stream")
-        except Exception:
-            pass
-        pipeline.set_state(Gst.State.NULL)
-        cam.close()
+class PoseHistory:
+    """Fixed-size, array-backed ring of recent poses, oldest overwritten first.
+
+    Samples are appended in capture-time order by the capture thread; queries
+    copy out under the lock so HTTP handlers never see a half-written slot.
+    """
+
+    def __init__(self, capacity: int):
+        self.capacity = max(2, capacity)
+        self.ts = np.zeros(self.capacity, dtype=np.int64)
+        self.seq = np.zeros(self.capacity, dtype=np.uint32)
+        self.translation = np.zeros((self.capacity, 3), dtype=np.float64)
+        self.orientation = np.zeros((self.capacity, 4), dtype=np.float64)
+        self.state = np.zeros(self.capacity, dtype=np.uint8)
+        self._head = 0  # next slot to write
+        self._count = 0
+        self._lock = threading.Lock()
+
+    def append(self, ts: int, seq: int, translation, orientation, state: int) -> None:
+        with self._lock:
+            i = self._head
+            self.ts[i] = ts
+            self.seq[i] = seq & 0xFFFFFFFF
+            self.translation[i] = translation
+            self.orientation[i] = orientation
+            self.state[i] = state & 0xFF
+            self._head = (i + 1) % self.capacity
+            self._count = min(self._count + 1, self.capacity)
+
+    def _order(self) -> np.ndarray:
+        start = (self._head - self._count) % self.capacity
+        return (start + np.arange(self._count)) % self.capacity
+
+    def since(self, since_ns: int):
+        """Samples with timestamp > since_ns, oldest first, as (ts, seq, translation, orientation, state) arrays."""
+        with self._lock:
+            idx = self._order()
+            idx = idx[np.searchsorted(self.ts[idx], since_ns, side="right"):]
+            return self.ts[idx], self.seq[idx], self.translation[idx], self.orientation[idx], self.state[idx]
+
+    def at(self, ts: int):
+        """Pose at `ts`: translation lerp + orientation SLERP between the bracketing samples.
+
+        Returns None if `ts` is older than the history; timestamps newer than
+        the last sample are clamped to it.
+        """
+        with self._lock:
+            if self._count == 0:
+                return None
+            idx = self._order()
+            times = self.ts[idx]
+            if ts < times[0]:
+                return None
+            k = int(np.searchsorted(times, ts, side="right"))
+            if k >= len(idx):
+                j = idx[-1]
+                return {"timestamp_ns": int(times[-1]), "translation_m": self.translation[j].tolist(), "orientation_xyzw": self.orientation[j].tolist(), "state": int(self.state[j]), "clamped": True}
+            a, b = idx[k - 1], idx[k]
+            t0, t1 = int(self.ts[a]), int(self.ts[b])
+            u = (ts - t0) / (t1 - t0) if t1 > t0 else 0.0
+            translation = self.translation[a] + u * (self.translation[b] - self.translation[a])
+            orientation = slerp_quat(self.orientation[a], self.orientation[b], u)
+            state = self.state[a] if u < 0.5 else self.state[b]
+            return {"timestamp_ns": int(ts), "translation_m": translation.tolist(), "orientation_xyzw": orientation.tolist(), "state": int(state), "clamped": False}
+
+
+def encode_pose_samples(serial: int, samples, fmt: str) -> bytes:
+    """Encode PoseHistory.since() output as NDJSON or concatenated POSE_RECORD structs."""
+    ts, seq, translation, orientation, state = samples
+    if fmt == "bin":
+        return b"".join(
+            POSE_RECORD.pack(POSE_MAGIC, POSE_VERSION, int(state[i]), serial & 0xFFFFFFFF, int(seq[i]), int(ts[i]), *translation[i], *orientation[i])
+            for i in range(len(ts))
+        )
+    lines = (
+        json.dumps({"timestamp_ns": int(ts[i]), "seq": int(seq[i]), "translation_m": translation[i].tolist(), "orientation_xyzw": orientation[i].tolist(), "state": int(state[i])}, separators=(",", ":"))
+        for i in range(len(ts))
+    )
+    return "".join(line + "\n" for line in lines).encode("utf-8")
+
+
+def make_pose_publisher(args: argparse.Namespace):
+    if not args.pose_multicast or args.no_pose_tracking:
+        return None
+    group, port = args.pose_multicast.rsplit(":", 1)
+    decimations = [int(x) for x in args.pose_decimations.split(",") if x.strip()]
+    return PosePublisher(group, int(port), decimations or [1], args.pose_ttl)
+
 
+# Depth chunk header: magic, version, codec, serial, capture ns, depth frame seq,
+# chunk index, chunk count, width, height. Payload chunks concatenate to one
+# compressed depth map (uint16 millimetres, 0 = no depth).
+DEPTH_CHUNK = struct.Struct("<2sBBIQIHHHH")
+DEPTH_MAGIC = b"ZD"
+DEPTH_VERSION = 1
+DEPTH_CODECS = {"png": 0, "zstd": 1}
+DEPTH_CHUNK_PAYLOAD = 1400 - DEPTH_CHUNK.size
+
+
+def quantize_depth_mm(depth_m: np.ndarray) -> np.ndarray:
+    """Metres (NaN/inf for no depth) -> uint16 millimetres, 0 where invalid or out of range."""
+    mm = depth_m * 1000.0
+    mm[~np.isfinite(mm)] = 0.0
+    np.clip(mm, 0.0, 65535.0, out=mm)
+    return mm.astype(np.uint16)
+
+
+def _png_chunk(kind: bytes, data: bytes) -> bytes:
+    return struct.pack(">I", len(data)) + kind + data + struct.pack(">I", zlib.crc32(kind + data))
+
+
+def encode_png16(depth_mm: np.ndarray, level: int = 1) -> bytes:
+    """16-bit greyscale PNG; every row uses the Up filter, which suits smooth depth."""
+    height, width = depth_mm.shape
+    raw = depth_mm.astype(">u2").view(np.uint8).reshape(height, width * 2)
+    filtered = np.empty((height, width * 2 + 1), dtype=np.uint8)
+    filtered[:, 0] = 2  # Up
+    filtered[0, 1:] = raw[0]
+    np.subtract(raw[1:], raw[:-1], out=filtered[1:, 1:])
+    return (
+        b"\x89PNG\r\n\x1a\n"
+        + _png_chunk(b"IHDR", struct.pack(">IIBBBBB", width, height, 16, 0, 0, 0, 0))
+        + _png_chunk(b"IDAT", zlib.compress(filtered.tobytes(), level))
+        + _png_chunk(b"IEND", b"")
+    )
+
+
+class DepthSender:
+    """Compresses and sends depth maps on a worker thread, newest map wins.
+
+    The capture thread only retrieves and quantises; compression and the UDP
+    sends happen here so they never delay the video path. Per-frame CPU time
+    is thread CPU time, so it is not inflated by waiting.
+    """
+
+    def __init__(self, host: str, port: int, serial: int, codec: str, level: int, log):
+        self.target = (host, port)
+        self.serial = serial
+        self.codec = codec
+        self.log = log
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        if codec == "zstd":
+            self._compress = zstandard.ZstdCompressor(level=level).compress
+        else:
+            self._compress = lambda depth_mm: encode_png16(depth_mm, level)
+        self.frames = 0
+        self.replaced = 0
+        self.bytes_sent = 0
+        self.raw_bytes = 0
+        self.cpu_s = 0.0
+        self.retrieve_s = 0.0
+        self._pending = None
+        self._cond = threading.Condition()
+        self._stopped = False
+        self._last_report = (time.monotonic(), 0, 0, 0.0, 0.0)
+        self._thread = threading.Thread(target=self._run, name=f"zed-depth-{port}", daemon=True)
+        self._thread.start()
+
+    def submit(self, capture_ns: int, depth_mm: np.ndarray, retrieve_s: float) -> None:
+        with self._cond:
+            if self._pending is not None:
+                self.replaced += 1
+            self._pending = (capture_ns, depth_mm)
+            self.retrieve_s += retrieve_s
+            self._cond.notify()
+
+    def _run(self):
+        seq = 0
+        while True:
+            with self._cond:
+                while self._pending is None and not self._stopped:
+                    self._cond.wait()
+                if self._stopped:
+                    return
+                capture_ns, depth_mm = self._pending
+                self._pending = None
+            cpu0 = time.thread_time()
+            if self.codec == "zstd":
+                payload = self._compress(np.ascontiguousarray(depth_mm, dtype="<u2").tobytes())
+            else:
+                payload = self._compress(depth_mm)
+            height, width = depth_mm.shape
+            count = max(1, -(-len(payload) // DEPTH_CHUNK_PAYLOAD))
+            for i in range(count):
+                header = DEPTH_CHUNK.pack(
+                    DEPTH_MAGIC, DEPTH_VERSION, DEPTH_CODECS[self.codec], self.serial,
+                    capture_ns, seq & 0xFFFFFFFF, i, count, width, height,
+                )
+                chunk = payload[i * DEPTH_CHUNK_PAYLOAD:(i + 1) * DEPTH_CHUNK_PAYLOAD]
+                try:
+                    self.sock.sendto(header + chunk, self.target)
+                except OSError:
+                    pass
+                self.bytes_sent += len(header) + len(chunk)
+            self.cpu_s += time.thread_time() - cpu0
+            self.raw_bytes += depth_mm.nbytes
+            self.frames += 1
+            seq += 1
+
+    def summary(self) -> str:
+        """Cost since the previous summary: rate, bandwidth, bytes and CPU per depth map."""
+        now = time.monotonic()
+        t0, frames0, bytes0, cpu0, retrieve0 = self._last_report
+        self._last_report = (now, self.frames, self.bytes_sent, self.cpu_s, self.retrieve_s)
+        frames = self.frames - frames0
+        if frames <= 0:
+            return f"depth: no maps sent (replaced={self.replaced})"
+        elapsed = max(1e-6, now - t0)
+        sent = self.bytes_sent - bytes0
+        ratio = self.raw_bytes / max(1, self.bytes_sent)
+        return (
+            f"depth: {frames / elapsed:.1f} maps/s {sent * 8 / elapsed / 1e6:.2f} Mbps {sent / frames / 1024:.1f} KiB/map "
+            f"ratio={ratio:.1f}x retrieve={(self.retrieve_s - retrieve0) * 1000 / frames:.2f}ms "
+            f"{self.codec}={(self.cpu_s - cpu0) * 1000 / frames:.2f}ms cpu replaced={self.replaced}"
+        )
+
+    def close(self) -> None:
+        with self._cond:
+            self._stopped = True
+            self._cond.notify()
+        self._thread.join(timeout=1.0)
+        self.sock.close()
+
+
+def legacy_frame_buffer(frame: np.ndarray, stats: CopyStats) -> Gst.Buffer:
+    """Original handoff: tobytes() copy followed by a fill() copy."""
+    frame_bytes = memoryview(frame).tobytes()
+    buf = Gst.Buffer.new_allocate(None, len(frame_bytes), None)
+    buf.fill(0, frame_bytes)
+    stats.record(len(frame_bytes), 2)
+    return buf
+
+
+# Seconds between the NTP epoch (1900) and the Unix epoch (1970)
+NTP_UNIX_OFFSET_NS = 2_208_988_800 * 1_000_000_000
+
+
+def use_realtime_clock(pipeline: Gst.Pipeline) -> None:
+    """Run the pipeline on the wall clock with base time 0.
+
+    Running time then equals Unix epoch time, so the ZED image timestamps
+    (host wall clock, ns) can be used verbatim as buffer PTS.
+    """
+    clock = Gst.SystemClock(clock_type=Gst.ClockType.REALTIME)
+    pipeline.use_clock(clock)
+    pipeline.set_start_time(Gst.CLOCK_TIME_NONE)
+    pipeline.set_base_time(0)
+
+
+def capture_ts_ext_available() -> bool:
+    return Gst.ElementFactory.find("rtponviftimestamp") is not None
+
+
+# Pipeline rebuild backoff: 0.5 s doubling up to 5 s; 30 s of clean running resets it
+PIPELINE_RESTART_DELAY_S = 0.5
+PIPELINE_RESTART_MAX_DELAY_S = 5.0
+PIPELINE_RESTART_RESET_S = 30.0
+
+
+def pipeline_error_recoverable(err) -> bool:
+    """Whether a bus ERROR is worth rebuilding the pipeline for.
+
+    Caps negotiation, missing plugins and format errors come back on every
+    rebuild, so they stop the camera; anything else (sink/socket resource
+    errors, encoder hiccups, internal stream errors) gets a fresh pipeline.
+    """
+    fatal = (
+        (Gst.core_error_quark(), (Gst.CoreError.NEGOTIATION, Gst.CoreError.MISSING_PLUGIN, Gst.CoreError.NOT_IMPLEMENTED)),
+        (
+            Gst.stream_error_quark(),
+            (Gst.StreamError.FORMAT, Gst.StreamError.WRONG_TYPE, Gst.StreamError.CODEC_NOT_FOUND, Gst.StreamError.NOT_IMPLEMENTED),
+        ),
+    )
+    return not any(err.matches(domain, code) for domain, codes in fatal for code in codes)
+
+
+# Nominal ZED sensor output sizes, used where no camera is open (benchmarks)
+RESOLUTION_SIZES = {"VGA": (672, 376), "HD720": (1280, 720), "HD1080": (1920, 1080), "HD2K": (2208, 1242)}
+
+# appsrc pixel formats and their bytes per pixel; nvvidconv and videoconvert take all three
+PIXEL_FORMATS = {"RGBA": 4, "BGRA": 4, "GRAY8": 1}
+
+
+class EncoderBackend:
+    """An encoder chain from RGBA system memory to a named RTP payloader.
+
+    `chain` is a gst-launch fragment formatted with gop, bitrate,
+    bitrate_kbps, size and suffix; the encoder (if any) is named
+    "enc{suffix}" and the payloader "pay{suffix}". The converter applies
+    `size` so a branch can be scaled in-pipeline. `bitrate_scale` converts
+    bps into the encoder's bitrate unit.
+    """
+
+    def __init__(self, name: str, elements, chain: str, payloader: str, bitrate_scale: float = 1.0):
+        self.name = name
+        self.elements = elements
+        self.chain = chain
+        self.payloader = payloader
+        self.bitrate_scale = bitrate_scale
+
+    def available(self) -> bool:
+        return all(Gst.ElementFactory.find(element) is not None for element in self.elements)
+
+    @property
+    def encoded(self) -> bool:
+        """True when the chain ends in h264parse, so a tap there gets H.264 access units."""
+        return "h264parse" in self.elements
+
+    def launch_fragment(self, gop: int, bitrate: int, size: str = "", suffix: str = "", tap: str = "") -> str:
+        """Chain + payloader; `size` (",width=W,height=H") scales in the converter, `suffix` keeps names unique.
+
+        `tap` is inserted between the chain and the payloader (e.g. a tee for recording).
+        """
+        fields = dict(gop=gop, bitrate=bitrate, bitrate_kbps=max(1, bitrate // 1000), size=size, suffix=suffix)
+        return self.chain.format(**fields) + tap + self.payloader.format(**fields)
+
+    def set_bitrate(self, encoder, bps: int) -> None:
+        encoder.set_property("bitrate", int(bps * self.bitrate_scale))
+
+
+ENCODER_BACKENDS = {
+    backend.name: backend
+    for backend in (
+        EncoderBackend(
+            "nvv4l2h264enc",
+            ["nvvidconv", "nvv4l2h264enc", "h264parse", "rtph264pay"],
+            "nvvidconv ! video/x-raw(memory:NVMM),format=NV12{size} "
+            "! nvv4l2h264enc name=enc{suffix} insert-sps-pps=true iframeinterval={gop} idrinterval={gop} bitrate={bitrate} preset-level=1 "
+            "! h264parse config-interval=-1 ! ",
+            "rtph264pay name=pay{suffix} pt=96",
+        ),
+        EncoderBackend(
+            "x264enc",
+            ["videoconvert", "videoscale", "x264enc", "h264parse", "rtph264pay"],
+            "videoscale ! videoconvert ! video/x-raw,format=I420{size} "
+            "! x264enc name=enc{suffix} tune=zerolatency speed-preset=ultrafast key-int-max={gop} bitrate={bitrate_kbps} "
+            "! h264parse config-interval=-1 ! ",
+            "rtph264pay name=pay{suffix} pt=96",
+            bitrate_scale=1e-3,
+        ),
+        EncoderBackend(
+            "openh264enc",
+            ["videoconvert", "videoscale", "openh264enc", "h264parse", "rtph264pay"],
+            "videoscale ! videoconvert ! video/x-raw,format=I420{size} "
+            "! openh264enc name=enc{suffix} complexity=low gop-size={gop} bitrate={bitrate} "
+            "! h264parse config-interval=-1 ! ",
+            "rtph264pay name=pay{suffix} pt=96",
+        ),
+        # Uncompressed RGBA over RTP (RFC 4175): no encode cost, for profiling the push path
+        EncoderBackend("raw", ["videoscale", "rtpvrawpay"], "videoscale ! video/x-raw{size} ! ", "rtpvrawpay name=pay{suffix} pt=96"),
+    )
+}
+
+
+def select_encoder_backend(name: str) -> EncoderBackend:
+    if name != "auto":
+        backend = ENCODER_BACKENDS[name]
+        if not backend.available():
+            raise RuntimeError(f"Encoder backend '{name}' needs elements {backend.elements} which are not all installed")
+        return backend
+    for backend in ENCODER_BACKENDS.values():
+        if backend.available():
+            return backend
+    raise RuntimeError("No encoder backend available")
+
+
+def benchmark_encoder(backend: EncoderBackend, width: int, height: int, fps: int, bitrate: int, frames: int) -> dict:
+    """Push `frames` synthetic RGBA frames through one backend as fast as it goes."""
+    pipeline = Gst.parse_launch(
+        f"videotestsrc num-buffers={frames} pattern=ball "
+        f"! video/x-raw,format=RGBA,width={width},height={height},framerate={fps}/1 "
+        f"! queue ! {backend.launch_fragment(fps, bitrate)} ! fakesink sync=false"
+    )
+    encoded = {"frames": 0, "bytes": 0}
+
+    def count_payload_input(pad, info):
+        buf = info.get_buffer()
+        if buf is not None:
+            encoded["frames"] += 1
+            encoded["bytes"] += buf.get_size()
+        return Gst.PadProbeReturn.OK
+
+    pipeline.get_by_name("pay").get_static_pad("sink").add_probe(Gst.PadProbeType.BUFFER, count_payload_input)
+    bus = pipeline.get_bus()
+    cpu0 = os.times()
+    wall0 = time.monotonic()
+    pipeline.set_state(Gst.State.PLAYING)
+    msg = bus.timed_pop_filtered(Gst.CLOCK_TIME_NONE, Gst.MessageType.ERROR | Gst.MessageType.EOS)
+    wall = time.monotonic() - wall0
+    cpu1 = os.times()
+    pipeline.set_state(Gst.State.NULL)
+    if msg is not None and msg.type == Gst.MessageType.ERROR:
+        err, _ = msg.parse_error()
+        raise RuntimeError(str(err))
+    n = max(1, encoded["frames"])
+    cpu = (cpu1.user - cpu0.user) + (cpu1.system - cpu0.system)
+    return {
+        "frames": encoded["frames"],
+        "fps": encoded["frames"] / wall if wall > 0 else 0.0,
+        "cpu_ms_per_frame": cpu * 1000.0 / n,
+        "bytes_per_frame": encoded["bytes"] / n,
+    }
+
+
+def run_encoder_benchmark(args: argparse.Namespace) -> int:
+    width, height = RESOLUTION_SIZES[args.resolution]
+    names = list(ENCODER_BACKENDS) if args.encoder == "auto" else [args.encoder]
+    print(f"Encoder benchmark: {width}x{height} RGBA, {args.benchmark_frames} frames, bitrate {args.bitrate}")
+    print(f"{'backend':<16}{'fps':>10}{'cpu ms/frame':>15}{'bytes/frame':>14}")
+    for name in names:
+        backend = ENCODER_BACKENDS[name]
+        if not backend.available():
+            print(f"{name:<16}{'unavailable':>10}")
+            continue
+        try:
+            result = benchmark_encoder(backend, width, height, args.fps, args.bitrate, args.benchmark_frames)
+        except Exception as e:
+            print(f"{name:<16}{'failed':>10}  {e}")
+            continue
+        print(f"{name:<16}{result['fps']:>10.1f}{result['cpu_ms_per_frame']:>15.2f}{result['bytes_per_frame']:>14.0f}")
     return 0
 
 
-if __name__ == "__main__":
-    sys.exit(main())
+# Payload types used by the loss protection; the Mac display app uses the same values
+MEDIA_PT = 96
+RTX_PT = 97
+FEC_PT = 122
+RED_PT = 123
+
+
+def protection_fragment(fec_percentage: int = 0, rtx: bool = False, rtx_time_ms: int = 500) -> str:
+    """Elements between the payloader and the sink for FEC and/or retransmission.
 
+    ULPFEC packets are wrapped with the media in RED so a receiver sees a single
+    payload type until rtpreddec. rtprtxsend sits just upstream of rtpbin, where
+    the session's retransmission requests (from RTCP NACKs) arrive as events.
+    """
+    fragment = ""
+    pt = MEDIA_PT
+    if fec_percentage:
+        fragment += (
+            f"! rtpulpfecenc pt={FEC_PT} percentage={fec_percentage} "
+            f"! rtpredenc pt={RED_PT} allow-no-red-blocks=true "
+        )
+        pt = RED_PT
+    if rtx:
+        fragment += f"! rtprtxsend payload-type-map=\"application/x-rtp-pt-map,{pt}=(uint){RTX_PT}\" max-size-time={rtx_time_ms} "
+    return fragment
 
+
+def fec_receive_fragment(latency_ms: int = 100) -> str:
+    """Receiver chain (udpsrc -> here -> depayloader) that rebuilds lost packets from ULPFEC.
+
+    rtpstorage keeps recent packets before the jitterbuffer, so when the
+    jitterbuffer declares a packet lost the FEC packets after it are already
+    stored for rtpulpfecdec.
+    """
+    return (
+        f"rtpreddec pt={RED_PT} "
+        f"! rtpstorage size-time={(latency_ms + 150) * 1_000_000} "
+        f"! rtpssrcdemux "
+        f"! rtpjitterbuffer do-lost=true latency={latency_ms} "
+        f"! rtpulpfecdec name=fecdec pt={FEC_PT} ! "
+    )
+
+
+class FrameIntegrity:
+    """Counts frames whose RTP packets all arrived (after any recovery), by sequence number."""
+
+    def __init__(self):
+        self.intact = 0
+        self.frames = 0
+        self._last_seq = None
+        self._ts = None
+        self._ok = False
+
+    def on_packet(self, header: bytes) -> None:
+        if len(header) < 12 or header[1] & 0x7F != MEDIA_PT:
+            return
+        marker = bool(header[1] & 0x80)
+        seq, ts = struct.unpack_from(">HI", header, 2)
+        gap = self._last_seq is not None and seq != (self._last_seq + 1) & 0xFFFF
+        self._last_seq = seq
+        if ts != self._ts:
+            self._ts = ts
+            self._ok = not gap
+            self.frames += 1
+        elif gap:
+            self._ok = False
+        if marker and self._ok:
+            self.intact += 1
+            self._ok = False
+
+
+def run_lossy_relay(sock: socket.socket, target, loss: float, seed: int, stop: threading.Event, counters: dict):
+    """netem-style dropper: forward datagrams to target, dropping each with probability `loss`."""
+    import random
+
+    rng = random.Random(seed)
+    sock.settimeout(0.2)
+    while not stop.is_set():
+        try:
+            packet = sock.recv(65536)
+        except socket.timeout:
+            continue
+        counters["packets"] += 1
+        counters["bytes"] += len(packet)
+        if rng.random() < loss:
+            counters["dropped"] += 1
+            continue
+        sock.sendto(packet, target)
+
+
+def benchmark_loss(backend: EncoderBackend, width: int, height: int, fps: int, bitrate: int, frames: int,
+                   loss: float, fec_percentage: int) -> dict:
+    """Stream `frames` synthetic frames over a lossy loopback relay and count intact frames at the receiver."""
+    relay = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    relay.bind(("127.0.0.1", 0))
+    probe = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    probe.bind(("127.0.0.1", 0))
+    recv_port = probe.getsockname()[1]
+    probe.close()
+
+    caps = f"application/x-rtp,media=video,clock-rate=90000,encoding-name=H264,payload={MEDIA_PT}"
+    chain = fec_receive_fragment() if fec_percentage else "rtpjitterbuffer do-lost=true latency=100 ! "
+    receiver = Gst.parse_launch(f"udpsrc port={recv_port} caps=\"{caps}\" ! {chain}identity name=check ! fakesink sync=false")
+    sender = Gst.parse_launch(
+        f"videotestsrc is-live=true num-buffers={frames} pattern=ball "
+        f"! video/x-raw,format=RGBA,width={width},height={height},framerate={fps}/1 "
+        f"! queue ! {backend.launch_fragment(fps, bitrate)} {protection_fragment(fec_percentage)}"
+        f"! udpsink host=127.0.0.1 port={relay.getsockname()[1]} sync=false"
+    )
+    integrity = FrameIntegrity()
+
+    def check_packet(pad, info):
+        buf = info.get_buffer()
+        if buf is not None:
+            integrity.on_packet(buf.extract_dup(0, min(12, buf.get_size())))
+        return Gst.PadProbeReturn.OK
+
+    receiver.get_by_name("check").get_static_pad("src").add_probe(Gst.PadProbeType.BUFFER, check_packet)
+    sent = {"frames": 0}
+
+    def count_frame(pad, info):
+        sent["frames"] += 1
+        return Gst.PadProbeReturn.OK
+
+    sender.get_by_name("pay").get_static_pad("sink").add_probe(Gst.PadProbeType.BUFFER, count_frame)
+    counters = {"packets": 0, "bytes": 0, "dropped": 0}
+    stop = threading.Event()
+    relay_thread = threading.Thread(
+        target=run_lossy_relay, args=(relay, ("127.0.0.1", recv_port), loss, 1, stop, counters), daemon=True
+    )
+    receiver.set_state(Gst.State.PLAYING)
+    relay_thread.start()
+    sender.set_state(Gst.State.PLAYING)
+    msg = sender.get_bus().timed_pop_filtered(Gst.CLOCK_TIME_NONE, Gst.MessageType.ERROR | Gst.MessageType.EOS)
+    time.sleep(0.5)  # let the jitterbuffer give up on the last losses
+    stop.set()
+    relay_thread.join()
+    relay.close()
+    sender.set_state(Gst.State.NULL)
+    receiver.set_state(Gst.State.NULL)
+    if msg is not None and msg.type == Gst.MessageType.ERROR:
+        err, _ = msg.parse_error()
+        raise RuntimeError(str(err))
+    n = max(1, sent["frames"])
+    return {
+        "frames": sent["frames"],
+        "intact": integrity.intact,
+        "intact_pct": 100.0 * integrity.intact / n,
+        "bytes_per_frame": counters["bytes"] / n,
+        "dropped": counters["dropped"],
+    }
+
+
+def run_loss_benchmark(args: argparse.Namespace) -> int:
+    width, height = RESOLUTION_SIZES[args.resolution]
+    try:
+        backend = select_encoder_backend(args.encoder)
+    except RuntimeError as e:
+        print(f"Error: {e}")
+        return 3
+    losses = [float(v) for v in args.benchmark_loss.split(",") if v.strip()]
+    levels = [int(v) for v in args.benchmark_fec_levels.split(",") if v.strip()]
+    print(
+        f"Loss benchmark: {backend.name} {width}x{height} @ {args.fps} fps, {args.benchmark_frames} frames, "
+        f"bitrate {args.bitrate}, random loss on loopback"
+    )
+    print(f"{'loss %':>7}{'fec %':>7}{'intact %':>10}{'bytes/frame':>13}{'overhead %':>12}")
+    for loss in losses:
+        baseline = None
+        for level in levels:
+            try:
+                result = benchmark_loss(
+                    backend, width, height, args.fps, args.bitrate, args.benchmark_frames, loss / 100.0, level
+                )
+            except Exception as e:
+                print(f"{loss:>7.1f}{level:>7}{'failed':>10}  {e}")
+                continue
+            if baseline is None and level == 0:
+                baseline = result["bytes_per_frame"]
+            overhead = 100.0 * (result["bytes_per_frame"] / baseline - 1.0) if baseline else float("nan")
+            print(
+                f"{loss:>7.1f}{level:>7}{result['intact_pct']:>10.1f}"
+                f"{result['bytes_per_frame']:>13.0f}{overhead:>12.1f}"
+            )
+    return 0
+
+
+@dataclass
+class ThumbnailSpec:
+    port: int
+    width: int
+    height: int
+    fps: int
+    bitrate: int
+
+
+def make_thumbnail_spec(args: argparse.Namespace, port: int):
+    if not args.thumb_port_offset:
+        return None
+    width, height = (int(v) for v in args.thumb_size.lower().split("x", 1))
+    return ThumbnailSpec(port + args.thumb_port_offset, width, height, args.thumb_fps, args.thumb_bitrate)
+
+
+class ClientFanout:
+    """Dynamic receiver list for one camera's multiudpsinks.
+
+    Viewers are added and removed while PLAYING; each packet is encoded once and
+    sent to every client. With --adaptive-bitrate the client's RTCP port
+    (port + --rtcp-port-offset) gets the sender reports too. Counters come from
+    multiudpsink's get-stats action signal.
+    """
+
+    STREAM_SINKS = {"main": "out", "thumb": "out_thumb"}
+
+    def __init__(self, pipeline: Gst.Pipeline, rtcp_offset: int = 0):
+        self.rtcp_offset = rtcp_offset
+        self.sinks = {}
+        self.rtcp_sink = None
+        self.clients = {}
+        self._seeds = set()  # (stream, host, port) every build sets through the sink's clients property
+        self._lock = threading.Lock()
+        self.attach(pipeline)
+
+    def attach(self, pipeline: Gst.Pipeline) -> None:
+        """Bind to a (re)built pipeline's sinks: re-add every client added at runtime, drop seeds removed at runtime."""
+        with self._lock:
+            self.sinks = {}
+            for stream, name in self.STREAM_SINKS.items():
+                sink = pipeline.get_by_name(name)
+                if sink is not None:
+                    self.sinks[stream] = sink
+                    self.clients.setdefault(stream, set())
+            self.rtcp_sink = pipeline.get_by_name("out_rtcp")
+            for stream, clients in self.clients.items():
+                for host, port in clients:
+                    if (stream, host, port) in self._seeds or stream not in self.sinks:
+                        continue
+                    self.sinks[stream].emit("add", host, port)
+                    if stream == "main" and self.rtcp_sink is not None:
+                        self.rtcp_sink.emit("add", host, port + self.rtcp_offset)
+            for stream, host, port in self._seeds:
+                if stream not in self.sinks or (host, port) in self.clients[stream]:
+                    continue
+                self.sinks[stream].emit("remove", host, port)
+                if stream == "main" and self.rtcp_sink is not None:
+                    self.rtcp_sink.emit("remove", host, port + self.rtcp_offset)
+
+    def seed(self, stream: str, host: str, port: int) -> None:
+        """Record a client already set through the sink's clients property."""
+        if stream in self.clients:
+            self.clients[stream].add((host, port))
+            self._seeds.add((stream, host, port))
+
+    def add(self, stream: str, host: str, port: int) -> bool:
+        """Start sending stream to host:port; False for an unknown stream. Adding twice is a no-op."""
+        with self._lock:
+            if stream not in self.sinks:
+                return False
+            if (host, port) not in self.clients[stream]:
+                self.sinks[stream].emit("add", host, port)
+                if stream == "main" and self.rtcp_sink is not None:
+                    self.rtcp_sink.emit("add", host, port + self.rtcp_offset)
+                self.clients[stream].add((host, port))
+            return True
+
+    def remove(self, stream: str, host: str, port: int) -> bool:
+        """Stop sending stream to host:port; False if it was not a client."""
+        with self._lock:
+            if (host, port) not in self.clients.get(stream, ()) or stream not in self.sinks:
+                return False
+            self.sinks[stream].emit("remove", host, port)
+            if stream == "main" and self.rtcp_sink is not None:
+                self.rtcp_sink.emit("remove", host, port + self.rtcp_offset)
+            self.clients[stream].discard((host, port))
+            return True
+
+    def describe(self) -> list:
+        with self._lock:
+            entries = []
+            for stream, clients in self.clients.items():
+                for host, port in sorted(clients):
+                    stats = self.sinks[stream].emit("get-stats", host, port)
+                    entries.append(
+                        {
+                            "stream": stream,
+                            "host": host,
+                            "port": port,
+                            "bytes_sent": stats.get_value("bytes-sent") if stats else 0,
+                            "packets_sent": stats.get_value("packets-sent") if stats else 0,
+                        }
+                    )
+            return entries
+
+    def summary(self) -> str:
+        counts = " ".join(f"{stream}={len(clients)}" for stream, clients in self.clients.items())
+        return f"clients: {counts}"
+
+
+RECORD_MUXERS = {"mkv": "matroskamux", "mp4": "mp4mux"}
+
+
+def record_branch(location: str, fmt: str, segment_seconds: int) -> str:
+    """splitmuxsink branch fed from the "rtee" tee after h264parse; the queue leaks so a slow disk never stalls the stream."""
+    return (
+        f" rtee. ! queue name=rec_q max-size-buffers=0 max-size-bytes=0 max-size-time=2000000000 leaky=downstream "
+        f"! splitmuxsink name=rec location={location} muxer-factory={RECORD_MUXERS[fmt]} "
+        f"max-size-time={segment_seconds * 1_000_000_000} send-keyframe-requests=false"
+    )
+
+
+class SegmentRecorder:
+    """Rolling segment recording for one camera with a keyframe index.
+
+    Segments are named after the capture time (Unix ms) of their first frame,
+    which is also its PTS (see use_realtime_clock). Each keyframe written gets
+    an index entry {"ts", "file", "offset"}: the byte offset in the segment
+    where the muxer starts writing it, so an incident window can be cut from
+    the nearest keyframe without scanning. Entries are appended to
+    index.ndjson next to the segments. Oldest segments are deleted once
+    max_files or max_bytes is exceeded.
+    """
+
+    def __init__(self, splitmux, directory: str, fmt: str, max_files: int, max_bytes: int, log):
+        self.directory = directory
+        self.fmt = fmt
+        self.max_files = max_files
+        self.max_bytes = max_bytes
+        self.log = log
+        self.segments = deque()  # {"file", "start_ns"} oldest first
+        self.index = deque()  # {"ts", "file", "offset"}
+        self.deleted = 0
+        self._lock = threading.Lock()
+        self._index_file = open(os.path.join(directory, "index.ndjson"), "a")
+        self.attach(splitmux)
+
+    def attach(self, splitmux) -> None:
+        """Follow a (new) splitmuxsink; segments and index carry over across pipeline rebuilds."""
+        self.splitmux = splitmux
+        self._sink = None
+        self._position = 0
+        self._pending_ts = None
+        splitmux.connect("format-location-full", self._format_location)
+        splitmux.connect("element-added", self._on_element_added)
+        for child in splitmux.iterate_elements():
+            self._on_element_added(splitmux, child)
+
+    def _format_location(self, splitmux, fragment_id, first_sample):
+        buf = first_sample.get_buffer() if first_sample is not None else None
+        start_ns = buf.pts if buf is not None and buf.pts != Gst.CLOCK_TIME_NONE else time.time_ns()
+        name = f"{start_ns // 1_000_000}.{self.fmt}"
+        with self._lock:
+            self.segments.append({"file": name, "start_ns": start_ns})
+        return os.path.join(self.directory, name)
+
+    def _on_element_added(self, bin, element):
+        factory = element.get_factory()
+        if factory is None:
+            return
+        klass = factory.get_metadata("klass") or ""
+        if "Muxer" in klass:
+            element.connect("pad-added", lambda mux, pad: self._watch_mux_pad(pad))
+            for pad in element.sinkpads:
+                self._watch_mux_pad(pad)
+        elif "Sink" in klass:
+            self._sink = element
+            element.get_static_pad("sink").add_probe(
+                Gst.PadProbeType.BUFFER | Gst.PadProbeType.EVENT_DOWNSTREAM, self._on_file_data
+            )
+
+    def _watch_mux_pad(self, pad):
+        if pad.get_direction() == Gst.PadDirection.SINK:
+            pad.add_probe(Gst.PadProbeType.BUFFER, self._on_mux_input)
+
+    def _on_mux_input(self, pad, info):
+        buf = info.get_buffer()
+        if buf is not None and not buf.has_flags(Gst.BufferFlags.DELTA_UNIT):
+            self._pending_ts = buf.pts
+        return Gst.PadProbeReturn.OK
+
+    def _on_file_data(self, pad, info):
+        # Track the write position; muxers seek back with a BYTES segment to rewrite headers
+        if info.type & Gst.PadProbeType.EVENT_DOWNSTREAM:
+            event = info.get_event()
+            if event.type == Gst.EventType.SEGMENT:
+                segment = event.parse_segment()
+                if segment.format == Gst.Format.BYTES:
+                    self._position = segment.start
+            return Gst.PadProbeReturn.OK
+        buf = info.get_buffer()
+        if buf is None:
+            return Gst.PadProbeReturn.OK
+        if self._pending_ts is not None:
+            entry = {
+                "ts": self._pending_ts,
+                "file": os.path.basename(self._sink.get_property("location") or ""),
+                "offset": self._position,
+            }
+            self._pending_ts = None
+            with self._lock:
+                self.index.append(entry)
+                self._index_file.write(json.dumps(entry) + "\n")
+                self._index_file.flush()
+        self._position += buf.get_size()
+        return Gst.PadProbeReturn.OK
+
+    def on_fragment_closed(self) -> None:
+        """Apply retention after a segment is finalised (called from the bus handler)."""
+        with self._lock:
+            removed = set()
+            while len(self.segments) > 1:
+                files = [os.path.join(self.directory, s["file"]) for s in self.segments]
+                total = sum(os.path.getsize(f) for f in files if os.path.exists(f))
+                over_count = self.max_files and len(self.segments) > self.max_files
+                over_bytes = self.max_bytes and total > self.max_bytes
+                if not (over_count or over_bytes):
+                    break
+                oldest = self.segments.popleft()
+                try:
+                    os.remove(os.path.join(self.directory, oldest["file"]))
+                except OSError as e:
+                    self.log(f"[rec] could not delete {oldest['file']}: {e}")
+                removed.add(oldest["file"])
+                self.deleted += 1
+            if not removed:
+                return
+            self.index = deque(entry for entry in self.index if entry["file"] not in removed)
+            self._index_file.close()
+            with open(os.path.join(self.directory, "index.ndjson"), "w") as f:
+                f.writelines(json.dumps(entry) + "\n" for entry in self.index)
+            self._index_file = open(os.path.join(self.directory, "index.ndjson"), "a")
+
+    def window(self, start_ns: int, end_ns: int) -> dict:
+        """Where to cut [start_ns, end_ns]: the keyframe at or before start_ns and every segment it spans."""
+        with self._lock:
+            start = None
+            for entry in self.index:
+                if entry["ts"] > start_ns:
+                    break
+                start = entry
+            if start is None and self.index:
+                start = self.index[0]
+            first = next((s for s in self.segments if start and s["file"] == start["file"]), None)
+            segments = [
+                dict(s)
+                for s in self.segments
+                if (first is None or s["start_ns"] >= first["start_ns"]) and s["start_ns"] <= end_ns
+            ]
+        return {"start": start, "segments": segments, "directory": self.directory}
+
+    def summary(self) -> str:
+        with self._lock:
+            return f"rec: segments={len(self.segments)} keyframes={len(self.index)} deleted={self.deleted}"
+
+    def close(self) -> None:
+        with self._lock:
+            self._index_file.close()
+
+
+def build_pipeline(
+    host: str,
+    port: int,
+    width: int,
+    height: int,
+    fps: int,
+    bitrate: int,
+    max_bytes: int = 0,
+    leaky: bool = True,
+    capture_ts_ext: bool = False,
+    rtcp_port: int = 0,
+    backend: EncoderBackend = None,
+    thumb: ThumbnailSpec = None,
+    gop: int = 0,
+    fec_percentage: int = 0,
+    rtx: bool = False,
+    rtx_time_ms: int = 500,
+    record_location: str = "",
+    record_format: str = "mkv",
+    record_segment_seconds: int = 60,
+    pixel_format: str = "RGBA",
+) -> Gst.Pipeline:
+    # We push RGBA (or BGRA/GRAY8) from CPU into appsrc; the backend converts/encodes (nvvidconv + nvv4l2h264enc on Jetson); RTP payload; UDP send.
+    # Every stream ends in a multiudpsink seeded with host, so more viewers share the one encode (see ClientFanout).
+    backend = backend or ENCODER_BACKENDS["nvv4l2h264enc"]
+    gop = gop or fps
+    # With backpressure the queue must not leak, so a slow encoder fills appsrc and raises enough-data instead.
+    queue_opts = "leaky=downstream" if leaky else "leaky=no"
+    appsrc_opts = f"emit-signals=true block=false max-bytes={max_bytes} " if max_bytes else ""
+    # PTS are the sensor capture times (see use_realtime_clock); rtponviftimestamp turns them into
+    # the ONVIF replay header extension (absolute NTP capture time) on each frame's RTP packets.
+    ts_ext = f"! rtponviftimestamp ntp-offset={NTP_UNIX_OFFSET_NS} " if capture_ts_ext else ""
+    protection = protection_fragment(fec_percentage, rtx, rtx_time_ms)
+    if rtcp_port:
+        # rtpbin sends sender reports and collects the receiver's reports for the bitrate controller
+        sink = (
+            f"! rtpbin.send_rtp_sink_0 "
+            f"rtpbin name=rtpbin {'rtp-profile=avpf ' if rtx else ''}"
+            f"rtpbin.send_rtp_src_0 ! multiudpsink name=out clients={host}:{port} sync=false async=false "
+            f"rtpbin.send_rtcp_src_0 ! multiudpsink name=out_rtcp clients={host}:{rtcp_port} sync=false async=false "
+            f"udpsrc port={rtcp_port} ! rtpbin.recv_rtcp_sink_0"
+        )
+    else:
+        sink = f"! multiudpsink name=out clients={host}:{port} sync=false async=false"
+    # Simulcast: the same pushed frame is teed into a scaled, rate-limited thumbnail branch.
+    # Its queue always leaks so a slow thumbnail encoder never holds back the main stream.
+    tee = ""
+    thumb_branch = ""
+    # Recording taps the encoded stream after h264parse, so segments are written without a second encode
+    record = bool(record_location) and backend.encoded
+    rec_branch = record_branch(record_location, record_format, record_segment_seconds) if record else ""
+    if thumb is not None:
+        tee = "! tee name=t t. "
+        size = f",width={thumb.width},height={thumb.height}"
+        thumb_branch = (
+            f" t. ! queue max-size-buffers=2 leaky=downstream "
+            f"! videorate drop-only=true max-rate={thumb.fps} "
+            f"! {backend.launch_fragment(thumb.fps, thumb.bitrate, size=size, suffix='_thumb')} "
+            f"{ts_ext}"
+            f"! multiudpsink name=out_thumb clients={host}:{thumb.port} sync=false async=false"
+        )
+    pipeline_str = (
+        f"appsrc name=src is-live=true format=time do-timestamp=false {appsrc_opts}"
+        f"caps=\"video/x-raw,format={pixel_format},width={width},height={height},framerate={fps}/1\" "
+        f"{tee}"
+        f"! queue name=encq max-size-buffers=4 {queue_opts} "
+        f"! {backend.launch_fragment(gop, bitrate, tap='tee name=rtee ! ' if record else '')} "
+        f"{ts_ext}"
+        f"{protection}"
+        f"{sink}"
+        f"{thumb_branch}"
+        f"{rec_branch}"
+    )
+
+    pipeline = Gst.parse_launch(pipeline_str)
+    if not isinstance(pipeline, Gst.Pipeline):
+        raise RuntimeError("Failed to create GStreamer pipeline")
+    return pipeline
+
+
+POSE_PAGE = (
+    "<!doctype html><html><head><meta charset='utf-8'><title>ZED Pose</title>"
+    "<style>body{font-family:sans-serif;margin:16px}pre{background:#f4f4f4;padding:12px;border-radius:6px}</style>"
+    "</head><body><h2>ZED Pose (HTTP :8000)</h2>"
+    "<div>Long-polling /pose/next (one request per pose update)</div>"
+    "<pre id='out'>waiting...</pre>"
+    "<script>let after=0;const q=location.search?'&'+location.search.slice(1):'';"
+    "async function tick(){let wait=0;try{const r=await fetch('/pose/next?after='+after+q);"
+    "if(r.status===200){const j=await r.json();after=j.timestamp_ns;document.getElementById('out').textContent=JSON.stringify(j,null,2);}"
+    "}catch(e){document.getElementById('out').textContent=String(e);wait=1000;}finally{setTimeout(tick,wait);} } tick();</script>"
+    "</body></html>"
+)
+
+
+def parse_roi(text: str, width: int, height: int):
+    """'X,Y,W,H' in retrieved-image pixels -> (x, y, w, h); W and H rounded down to even for 4:2:0 encoders."""
+    x, y, w, h = (int(v) for v in text.split(","))
+    w -= w % 2
+    h -= h % 2
+    if x < 0 or y < 0 or w <= 0 or h <= 0 or x + w > width or y + h > height:
+        raise ValueError(f"{text} does not fit in the {width}x{height} image")
+    return x, y, w, h
+
+
+def convert_rgba(frame: np.ndarray, width: int, height: int, pixel_format: str) -> np.ndarray:
+    """Nearest-neighbour scale and channel conversion of an RGBA frame, for sources without an SDK to do it."""
+    h, w = frame.shape[:2]
+    if (w, h) != (width, height):
+        rows = np.arange(height) * h // height
+        cols = np.arange(width) * w // width
+        frame = frame[rows[:, None], cols]
+    if pixel_format == "BGRA":
+        frame = frame[..., (2, 1, 0, 3)]
+    elif pixel_format == "GRAY8":
+        # BT.601 luma in 8.8 fixed point
+        frame = ((frame[..., :3] @ np.array([77, 150, 29], dtype=np.uint16)) >> 8).astype(np.uint8)
+    return frame
+
+
+class FrameSource:
+    """Where a CameraStreamer's frames come from.
+
+    grab() blocks until the next frame; capture_ns(), retrieve_image(),
+    pose() and retrieve_depth() then describe that frame. retrieve_image()
+    returns an H x W x channels uint8 array in the configure_output() size
+    and format that stays valid until the next grab. Sources implement
+    retrieve_rgba() and get scaling and conversion in NumPy, unless they
+    override retrieve_image() to have their SDK do it.
+    """
+
+    name = "source"
+    supports_depth = False
+    native_format = "RGBA"
+
+    def __init__(self):
+        self.width = 0
+        self.height = 0
+        self.tracking_enabled = False
+        self.out_width = 0
+        self.out_height = 0
+        self.pixel_format = "RGBA"
+
+    def open(self) -> bool:
+        raise NotImplementedError
+
+    def configure_depth(self, width: int, height: int) -> None:
+        pass
+
+    def grab(self, depth: bool = False) -> bool:
+        raise NotImplementedError
+
+    def capture_ns(self) -> int:
+        raise NotImplementedError
+
+    def retrieve_rgba(self) -> np.ndarray:
+        raise NotImplementedError
+
+    def configure_output(self, width: int, height: int, pixel_format: str) -> None:
+        """Size and pixel format retrieve_image() returns; call after open()."""
+        self.out_width = width
+        self.out_height = height
+        self.pixel_format = pixel_format
+
+    def retrieve_image(self) -> np.ndarray:
+        frame = self.retrieve_rgba()
+        if self.pixel_format == "RGBA" and self.out_width in (0, self.width) and self.out_height in (0, self.height):
+            return frame
+        return convert_rgba(frame, self.out_width, self.out_height, self.pixel_format)
+
+    def set_tracking(self, enabled: bool) -> bool:
+        """Turn positional tracking on or off; returns whether it is now on."""
+        self.tracking_enabled = enabled
+        return enabled
+
+    def pose(self):
+        """(translation_m xyz, orientation xyzw, state int, status text) of the last grab."""
+        return [0.0, 0.0, 0.0], [0.0, 0.0, 0.0, 1.0], 0, "UNKNOWN"
+
+    def pose_ns(self) -> int:
+        """Capture time of the frame the last pose() belongs to (0 = unknown, use the grab's)."""
+        return 0
+
+    def retrieve_depth(self):
+        """Depth in metres (float32, configure_depth size) for a grab made with depth=True, or None."""
+        return None
+
+    def close(self) -> None:
+        pass
+
+
+class ProfileCache:
+    """Small JSON file of the open settings that last worked, keyed per camera and request."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        try:
+            with open(path) as f:
+                self.profiles = json.load(f)
+        except (OSError, ValueError):
+            self.profiles = {}
+
+    def get(self, key: str):
+        with self._lock:
+            return self.profiles.get(key)
+
+    def put(self, key: str, profile: dict) -> None:
+        with self._lock:
+            if self.profiles.get(key) == profile:
+                return
+            self.profiles[key] = profile
+            try:
+                os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+                tmp = self.path + ".tmp"
+                with open(tmp, "w") as f:
+                    json.dump(self.profiles, f, indent=1, sort_keys=True)
+                os.replace(tmp, self.path)
+            except OSError as e:
+                print(f"Warning: could not write profile cache {self.path}: {e}")
+
+
+class ZedSource(FrameSource):
+    """A ZED camera through pyzed, with the resolution fallback cascade and positional tracking."""
+
+    name = "zed"
+    supports_depth = True
+    native_format = "BGRA"  # VIEW.LEFT
+
+    def __init__(self, spec: CameraSpec, args: argparse.Namespace, log, profile_cache: ProfileCache = None):
+        super().__init__()
+        self.spec = spec
+        self.args = args
+        self.log = log
+        self.profile_cache = profile_cache
+        self.cam = sl.Camera()
+        self.img = sl.Mat()
+        self.runtime_params = sl.RuntimeParameters()
+        self.sl_pose = sl.Pose()
+        self.view = sl.VIEW.LEFT
+        self.out_res = sl.Resolution(0, 0)  # 0x0 = camera size
+        self._rgba = None
+        self.depth_available = False
+        self.depth_mat = None
+        self.depth_res = None
+
+    def _enable_tracking(self) -> None:
+        # Enable positional tracking (no area memory file for now)
+        try:
+            tracking_params = sl.PositionalTrackingParameters()
+            self.tracking_enabled = self.cam.enable_positional_tracking(tracking_params) == sl.ERROR_CODE.SUCCESS
+        except Exception as e:
+            self.log(f"Warning: failed to enable positional tracking: {e}")
+
+    def set_tracking(self, enabled: bool) -> bool:
+        if enabled and not self.tracking_enabled:
+            self._enable_tracking()
+        elif not enabled and self.tracking_enabled:
+            self.cam.disable_positional_tracking()
+            self.tracking_enabled = False
+        return self.tracking_enabled
+
+    def _open_with(self, res, fps: int, serial: int):
+        init_params = sl.InitParameters()
+        init_params.camera_resolution = res
+        init_params.camera_fps = fps
+        # Depth is only computed when a depth channel or positional tracking needs it
+        self.depth_available = bool(self.args.depth_port_offset or not self.args.no_pose_tracking or self.args.benchmark_pose)
+        init_params.depth_mode = getattr(sl.DEPTH_MODE, self.args.depth_mode) if self.depth_available else sl.DEPTH_MODE.NONE
+        init_params.coordinate_units = sl.UNIT.METER
+        if serial:
+            init_params.set_from_serial_number(serial)
+        return self.cam.open(init_params)
+
+    def open(self) -> bool:
+        args = self.args
+        cam = self.cam
+        t0 = time.monotonic()
+        attempts = []  # (resolution, fps, serial) in the order tried
+        tried = {}  # (resolution, fps, serial) -> status
+        invalid = set()  # (resolution, fps) the camera rejected; a mode, so it holds whichever serial opened it
+        # Cached profile of the last successful open for this camera and request
+        cache_key = f"{self.spec.serial or 'default'}:{self.spec.port}:{args.resolution}@{args.fps}"
+        cached = self.profile_cache.get(cache_key) if self.profile_cache is not None else None
+        status = None
+        cache_hit = False
+        if cached is not None:
+            try:
+                profile = (getattr(sl.RESOLUTION, cached["resolution"]), int(cached["fps"]), int(cached["serial"]))
+            except (AttributeError, KeyError, TypeError, ValueError):
+                profile = None
+            if profile is not None:
+                attempts.append(profile)
+                status = self._open_with(*profile)
+                tried[profile] = status
+                if status == sl.ERROR_CODE.INVALID_RESOLUTION:
+                    invalid.add(profile[:2])
+                cache_hit = status == sl.ERROR_CODE.SUCCESS
+
+        if status != sl.ERROR_CODE.SUCCESS:
+            # ZED initialization with resolution fallback
+            requested_res = resolution_choice_to_enum(args.resolution)
+            fallback_order = [requested_res, sl.RESOLUTION.HD720, sl.RESOLUTION.HD1080, sl.RESOLUTION.VGA, sl.RESOLUTION.HD2K]
+            for res in fallback_order:
+                candidates = [(res, args.fps, self.spec.serial)]
+                for profile in candidates:
+                    if profile in tried or profile[:2] in invalid:
+                        # Already tried (or a rejected mode); its fps fallback still applies
+                        status = tried.get(profile, sl.ERROR_CODE.INVALID_RESOLUTION)
+                    else:
+                        attempts.append(profile)
+                        status = self._open_with(*profile)
+                        tried[profile] = status
+                        if status == sl.ERROR_CODE.INVALID_RESOLUTION:
+                            invalid.add(profile[:2])
+                    # If resolution invalid, try again with a safer fps as well
+                    if status == sl.ERROR_CODE.INVALID_RESOLUTION and profile[1] > 15:
+                        candidates.append((res, 15, self.spec.serial))
+                if status == sl.ERROR_CODE.SUCCESS:
+                    break
+
+        elapsed = time.monotonic() - t0
+        source = "cached profile" if cache_hit else "resolution cascade"
+        if status != sl.ERROR_CODE.SUCCESS:
+            self.log(f"Failed to open ZED after {len(attempts)} attempts in {elapsed:.1f}s: {repr(status)}")
+            return False
+        res, fps, _ = attempts[-1]
+        self.log(f"Opened ZED {res.name}@{fps} in {elapsed:.1f}s, {len(attempts)} attempt(s) ({source})")
+        if not args.no_pose_tracking:
+            self._enable_tracking()
+        if self.profile_cache is not None:
+            try:
+                serial = int(cam.get_camera_information().serial_number)
+            except Exception:
+                serial = self.spec.serial
+            self.profile_cache.put(cache_key, {"resolution": res.name, "fps": fps, "serial": serial})
+
+        cam_info = cam.get_camera_information()
+        try:
+            # SDK >= 4.x/5.x: resolution is under camera_configuration
+            res_obj = cam_info.camera_configuration.resolution
+            self.width = res_obj.width
+            self.height = res_obj.height
+        except Exception:
+            # Fallback for older SDKs (if any)
+            self.width = 1280
+            self.height = 720
+        return True
+
+    def configure_depth(self, width: int, height: int) -> None:
+        self.depth_mat = sl.Mat()
+        self.depth_res = sl.Resolution(width, height)
+
+    def grab(self, depth: bool = False) -> bool:
+        if self.depth_available:
+            # Only pay for depth on the grabs whose depth map is sent (tracking needs it on every grab)
+            self.runtime_params.enable_depth = depth or self.tracking_enabled
+        return self.cam.grab(self.runtime_params) == sl.ERROR_CODE.SUCCESS
+
+    def capture_ns(self) -> int:
+        # Sensor capture time of this frame (host wall clock, ns since Unix epoch)
+        return self.cam.get_timestamp(sl.TIME_REFERENCE.IMAGE).get_nanoseconds() or time.time_ns()
+
+    def retrieve_rgba(self) -> np.ndarray:
+        self.cam.retrieve_image(self.img, sl.VIEW.LEFT, sl.MEM.CPU)
+        return self.img.get_data(deep_copy=False)[..., (2, 1, 0, 3)]  # the SDK delivers BGRA
+
+    def configure_output(self, width: int, height: int, pixel_format: str) -> None:
+        super().configure_output(width, height, pixel_format)
+        self.view = sl.VIEW.LEFT_GRAY if pixel_format == "GRAY8" else sl.VIEW.LEFT
+        self.out_res = sl.Resolution(width, height)
+
+    def retrieve_image(self) -> np.ndarray:
+        # The SDK scales (and picks the grey view) while retrieving, so no full-size image is copied to the CPU
+        self.cam.retrieve_image(self.img, self.view, sl.MEM.CPU, self.out_res)
+        frame = self.img.get_data(deep_copy=False)
+        if self.pixel_format != "RGBA":
+            return frame
+        # VIEW.LEFT is BGRA only; RGBA costs a red/blue swap into a reused array
+        if self._rgba is None or self._rgba.shape != frame.shape:
+            self._rgba = np.empty_like(frame)
+        np.take(frame, (2, 1, 0, 3), axis=2, out=self._rgba)
+        return self._rgba
+
+    def pose(self):
+        # Pose in the WORLD frame
+        tracking_state = self.cam.get_position(self.sl_pose, sl.REFERENCE_FRAME.WORLD)
+        # translation [x,y,z] in meters
+        try:
+            t = self.sl_pose.get_translation().get()
+        except Exception:
+            t = [0.0, 0.0, 0.0]
+        # orientation quaternion [x,y,z,w]
+        try:
+            q = self.sl_pose.get_orientation().get()
+        except Exception:
+            q = [0.0, 0.0, 0.0, 1.0]
+        translation = [float(t[0]), float(t[1]), float(t[2])] if len(t) >= 3 else [0.0, 0.0, 0.0]
+        orientation = [float(q[0]), float(q[1]), float(q[2]), float(q[3])] if len(q) >= 4 else [0.0, 0.0, 0.0, 1.0]
+        return translation, orientation, int(getattr(tracking_state, "value", 0)), str(tracking_state)
+
+    def pose_ns(self) -> int:
+        try:
+            return self.sl_pose.timestamp.get_nanoseconds()
+        except Exception:
+            return 0
+
+    def retrieve_depth(self):
+        if self.cam.retrieve_measure(self.depth_mat, sl.MEASURE.DEPTH, sl.MEM.CPU, self.depth_res) != sl.ERROR_CODE.SUCCESS:
+            return None
+        return self.depth_mat.get_data(deep_copy=False)
+
+    def close(self) -> None:
+        self.cam.close()
+
+
+class PacedSource(FrameSource):
+    """Base for file and synthetic sources: frames released on a fixed-rate schedule with a fake pose.
+
+    The fake pose walks a 1 m circle every 10 s, yawing along it, and always
+    reports tracking OK, so pose consumers see plausible motion.
+    """
+
+    def __init__(self, args: argparse.Namespace, log):
+        super().__init__()
+        self.args = args
+        self.log = log
+        size = args.source_size or "x".join(str(v) for v in RESOLUTION_SIZES[args.resolution])
+        self.width, self.height = (int(v) for v in size.lower().split("x", 1))
+        self.period_ns = int(1e9 / max(1, args.fps))
+        self.tracking_enabled = not args.no_pose_tracking
+        self.frame_no = -1
+        self._next_ns = 0
+        self._capture_ns = 0
+        self._pose_ns = 0
+
+    def grab(self, depth: bool = False) -> bool:
+        now = time.time_ns()
+        if self._next_ns and now < self._next_ns:
+            time.sleep((self._next_ns - now) / 1e9)
+        elif now - self._next_ns > self.period_ns:
+            self._next_ns = now  # fell behind: restart the schedule rather than bursting
+        self._capture_ns = max(self._next_ns, time.time_ns())
+        self._next_ns += self.period_ns
+        self.frame_no += 1
+        return True
+
+    def capture_ns(self) -> int:
+        return self._capture_ns
+
+    def pose(self):
+        if not self.tracking_enabled:
+            return super().pose()
+        self._pose_ns = self._capture_ns
+        angle = 2.0 * np.pi * (self._pose_ns % 10_000_000_000) / 10_000_000_000
+        translation = [float(np.cos(angle)), 0.0, float(np.sin(angle))]
+        half = -angle / 2.0  # yaw about +Y, facing along the circle
+        orientation = [0.0, float(np.sin(half)), 0.0, float(np.cos(half))]
+        return translation, orientation, 1, "SYNTHETIC"
+
+    def pose_ns(self) -> int:
+        return self._pose_ns
+
+
+class SyntheticSource(PacedSource):
+    """Scrolling colour bars with a moving square, generated once and returned as views (no per-frame allocation)."""
+
+    name = "synthetic"
+    supports_depth = True
+
+    def open(self) -> bool:
+        w, h = self.width, self.height
+        x = np.arange(2 * w)
+        y = np.arange(h)[:, None]
+        pattern = np.empty((h, 2 * w, 4), dtype=np.uint8)
+        pattern[..., 0] = (x * 255 // max(1, w - 1)) % 256
+        pattern[..., 1] = (y * 255 // max(1, h - 1)).astype(np.uint8)
+        pattern[..., 2] = ((x // 64 + y // 64) % 2 * 200).astype(np.uint8)
+        pattern[..., 3] = 255
+        self.pattern = pattern
+        self.depth = None
+        return True
+
+    def configure_depth(self, width: int, height: int) -> None:
+        # A floor-like ramp from 0.5 m (bottom) to 10 m (top)
+        self.depth = np.repeat(np.linspace(10.0, 0.5, height, dtype=np.float32)[:, None], width, axis=1)
+
+    def retrieve_rgba(self) -> np.ndarray:
+        offset = (self.frame_no * 8) % self.width
+        return self.pattern[:, offset:offset + self.width]
+
+    def retrieve_depth(self):
+        return None if self.depth is None else self.depth.copy()
+
+
+class ImageDirSource(PacedSource):
+    """Loops over the images in a directory, decoded and resized once at open (needs OpenCV)."""
+
+    name = "images"
+    EXTENSIONS = (".png", ".jpg", ".jpeg", ".bmp")
+    MAX_IMAGES = 256
+
+    def __init__(self, path: str, args: argparse.Namespace, log):
+        super().__init__(args, log)
+        self.path = path
+        self.frames = []
+
+    def open(self) -> bool:
+        try:
+            import cv2
+        except ImportError:
+            self.log("Error: --source images needs OpenCV (python3-opencv)")
+            return False
+        names = sorted(n for n in os.listdir(self.path) if n.lower().endswith(self.EXTENSIONS))
+        if len(names) > self.MAX_IMAGES:
+            self.log(f"Using the first {self.MAX_IMAGES} of {len(names)} images")
+        for name in names[:self.MAX_IMAGES]:
+            image = cv2.imread(os.path.join(self.path, name), cv2.IMREAD_COLOR)
+            if image is None:
+                continue
+            image = cv2.resize(image, (self.width, self.height), interpolation=cv2.INTER_AREA)
+            self.frames.append(cv2.cvtColor(image, cv2.COLOR_BGR2RGBA))
+        if not self.frames:
+            self.log(f"Error: no readable images in {self.path}")
+            return False
+        return True
+
+    def retrieve_rgba(self) -> np.ndarray:
+        return self.frames[self.frame_no % len(self.frames)]
+
+
+class RawVideoSource(PacedSource):
+    """Loops over a file of back-to-back RGBA frames of --source-size, memory-mapped."""
+
+    name = "raw"
+
+    def __init__(self, path: str, args: argparse.Namespace, log):
+        super().__init__(args, log)
+        self.path = path
+        self.frames = None
+
+    def open(self) -> bool:
+        frame_bytes = self.width * self.height * 4
+        try:
+            count = os.path.getsize(self.path) // frame_bytes
+        except OSError as e:
+            self.log(f"Error: {e}")
+            return False
+        if count == 0:
+            self.log(f"Error: {self.path} holds no complete {self.width}x{self.height} RGBA frame")
+            return False
+        self.frames = np.memmap(self.path, dtype=np.uint8, mode="r", shape=(count, self.height, self.width, 4))
+        return True
+
+    def retrieve_rgba(self) -> np.ndarray:
+        return self.frames[self.frame_no % len(self.frames)]
+
+
+def make_frame_source(spec: CameraSpec, args: argparse.Namespace, log, profile_cache: ProfileCache = None) -> FrameSource:
+    kind, _, path = args.source.partition(":")
+    if kind == "zed":
+        return ZedSource(spec, args, log, profile_cache)
+    if kind == "synthetic":
+        return SyntheticSource(args, log)
+    if kind == "images":
+        return ImageDirSource(path, args, log)
+    if kind == "raw":
+        return RawVideoSource(path, args, log)
+    raise ValueError(f"Unknown --source '{args.source}' (zed, synthetic, images:DIR, raw:FILE)")
+
+
+def benchmark_pose(source: FrameSource, frames: int, tracking: bool, every: int = 1, rate_hz: float = 0.0) -> dict:
+    """Grab and retrieve `frames` frames with one pose mode, as the capture loop would."""
+    tracking = source.set_tracking(tracking)
+    sampler = None
+    if tracking and rate_hz > 0:
+        sampler = PoseSampler(source, rate_hz, lambda capture_ns, seq, pose: None, "zed-pose-bench")
+        sampler.start()
+    grabbed = 0
+    sampled = 0
+    pose_ns = 0
+    cpu0 = os.times()
+    wall0 = time.monotonic()
+    for seq in range(frames):
+        if not source.grab():
+            continue
+        grabbed += 1
+        capture_ns = source.capture_ns()
+        t0 = time.perf_counter_ns()
+        if sampler is not None:
+            sampler.note_grab(capture_ns, seq)
+        elif tracking and seq % every == 0:
+            source.pose()
+            sampled += 1
+        pose_ns += time.perf_counter_ns() - t0
+        source.retrieve_image()
+    wall = time.monotonic() - wall0
+    cpu1 = os.times()
+    if sampler is not None:
+        sampler.close()
+        sampled = sampler.samples
+    n = max(1, grabbed)
+    return {
+        "tracking": tracking,
+        "fps": grabbed / wall if wall > 0 else 0.0,
+        "capture_pose_ms": pose_ns / 1e6 / n,
+        "cpu_ms_per_frame": ((cpu1.user - cpu0.user) + (cpu1.system - cpu0.system)) * 1000.0 / n,
+        "poses_per_s": sampled / wall if wall > 0 else 0.0,
+    }
+
+
+def run_pose_benchmark(args: argparse.Namespace) -> int:
+    spec = parse_camera_specs(args)[0]
+    profile_cache = ProfileCache(args.profile_cache) if args.profile_cache and args.source == "zed" else None
+    source = make_frame_source(spec, args, print, profile_cache)
+    if not source.open():
+        return 2
+    source.configure_output(source.width, source.height, args.pixel_format or source.native_format)
+    rate = args.pose_rate or 10.0
+    modes = [("off", False, 1, 0.0), ("every frame", True, 1, 0.0)]
+    if args.pose_every > 1:
+        modes.append((f"every {args.pose_every}", True, args.pose_every, 0.0))
+    modes.append((f"thread {rate:g} Hz", True, 1, rate))
+    print(f"Pose benchmark: {source.name} {source.width}x{source.height} @ {args.fps} fps, {args.benchmark_frames} frames per mode")
+    print(f"{'pose mode':<18}{'fps':>8}{'vs every':>10}{'pose ms/frame':>15}{'cpu ms/frame':>14}{'poses/s':>9}")
+    baseline = None
+    try:
+        for label, tracking, every, rate_hz in modes:
+            result = benchmark_pose(source, args.benchmark_frames, tracking, every, rate_hz)
+            if tracking and not result["tracking"]:
+                print(f"{label:<18}{'tracking unavailable':>20}")
+                continue
+            if label == "every frame":
+                baseline = result["fps"]
+            gain = f"{result['fps'] - baseline:+.1f}" if baseline is not None else ""
+            print(
+                f"{label:<18}{result['fps']:>8.1f}{gain:>10}{result['capture_pose_ms']:>15.3f}"
+                f"{result['cpu_ms_per_frame']:>14.2f}{result['poses_per_s']:>9.1f}"
+            )
+    finally:
+        source.close()
+    return 0
+
+
+def benchmark_retrieve(source: FrameSource, frames: int, width: int, height: int, pixel_format: str, roi=None) -> dict:
+    """Retrieve (and crop) `frames` frames in one output configuration and copy each like the frame pool does."""
+    source.configure_output(width, height, pixel_format)
+    dst = None
+    retrieve_ns = 0
+    copy_ns = 0
+    copied = 0
+    for _ in range(frames):
+        if not source.grab():
+            continue
+        t0 = time.perf_counter_ns()
+        image = source.retrieve_image()
+        if roi is not None:
+            image = image[roi[1]:roi[1] + roi[3], roi[0]:roi[0] + roi[2]]
+        t1 = time.perf_counter_ns()
+        if dst is None:
+            dst = np.empty(image.shape, dtype=image.dtype)
+        np.copyto(dst, image)
+        copy_ns += time.perf_counter_ns() - t1
+        retrieve_ns += t1 - t0
+        copied += 1
+    n = max(1, copied)
+    return {
+        "retrieve_ms": retrieve_ns / 1e6 / n,
+        "copy_ms": copy_ns / 1e6 / n,
+        "bytes_per_frame": dst.nbytes if dst is not None else 0,
+    }
+
+
+def run_retrieve_benchmark(args: argparse.Namespace) -> int:
+    spec = parse_camera_specs(args)[0]
+    profile_cache = ProfileCache(args.profile_cache) if args.profile_cache and args.source == "zed" else None
+    source = make_frame_source(spec, args, print, profile_cache)
+    if not source.open():
+        return 2
+    w, h = source.width, source.height
+    half_w, half_h = w // 2 - w // 2 % 2, h // 2 - h // 2 % 2
+    centre = (w // 4, h // 4, half_w, half_h)
+    # The native order first: the other 4-channel order's row shows what its channel swap costs
+    native = source.native_format
+    swapped = "RGBA" if native == "BGRA" else "BGRA"
+    variants = [
+        ("full", w, h, native, None),
+        ("full", w, h, swapped, None),
+        ("full", w, h, "GRAY8", None),
+        ("half", half_w, half_h, native, None),
+        ("half", half_w, half_h, "GRAY8", None),
+        ("centre roi", w, h, native, parse_roi(",".join(str(v) for v in centre), w, h)),
+    ]
+    if args.retrieve_size or args.roi or args.pixel_format not in (None, native):
+        out_w, out_h = (int(v) for v in args.retrieve_size.lower().split("x", 1)) if args.retrieve_size else (w, h)
+        variants.append(("configured", out_w, out_h, args.pixel_format or native, parse_roi(args.roi, out_w, out_h) if args.roi else None))
+    print(f"Retrieve benchmark: {source.name} {w}x{h} @ {args.fps} fps, {args.benchmark_frames} frames per option")
+    print(f"{'option':<14}{'format':<7}{'size':>11}{'retrieve ms':>13}{'copy ms':>9}{'bytes/frame':>13}{'MB/s':>8}{'vs full':>9}")
+    full_bytes = None
+    try:
+        for label, out_w, out_h, pixel_format, roi in variants:
+            result = benchmark_retrieve(source, args.benchmark_frames, out_w, out_h, pixel_format, roi)
+            if full_bytes is None:
+                full_bytes = result["bytes_per_frame"] or 1
+            size = f"{roi[2]}x{roi[3]}" if roi else f"{out_w}x{out_h}"
+            print(
+                f"{label:<14}{pixel_format:<7}{size:>11}{result['retrieve_ms']:>13.3f}{result['copy_ms']:>9.3f}"
+                f"{result['bytes_per_frame']:>13}{result['bytes_per_frame'] * args.fps / 1e6:>8.1f}"
+                f"{100.0 * result['bytes_per_frame'] / full_bytes:>8.0f}%"
+            )
+    finally:
+        source.close()
+    return 0
+
+
+class CameraStreamer:
+    """One frame source (normally a ZED camera) streamed through its own appsrc pipeline.
+
+    Owns the source, the capture thread, the frame ring, the push thread and
+    the pipeline. Several streamers share one process and one GLib main loop;
+    pipeline bus messages arrive through a signal watch on that loop.
+    """
+
+    def __init__(
+        self, spec: CameraSpec, args: argparse.Namespace, backend: EncoderBackend, pose_publisher=None, profile_cache=None
+    ):
+        self.spec = spec
+        self.args = args
+        self.backend = backend
+        self.pose_publisher = pose_publisher
+        self.tag = f"[cam {spec.serial or 'default'}:{spec.port}]"
+        self.source = make_frame_source(spec, args, self.log, profile_cache)
+        self.stop_event = threading.Event()
+        self.ready = threading.Event()
+        self.pipeline = None
+        self.appsrc = None
+        self.width = 0
+        self.height = 0
+        self.fps = args.fps
+        self.threads = []
+        self.bitrate_controller = None
+        self.fanout = None
+        self.recorder = None
+        self.depth_sender = None
+        self.backpressure = None
+        self.pipeline_up = threading.Event()
+        self.pipeline_restarts = 0
+        self.pipeline_downtime_s = 0.0
+        self.frames_dropped_down = 0
+        self._consecutive_restarts = 0
+        self._last_restart = 0.0
+        self._down_since = 0.0
+        self.keyframes_forced = 0
+        self.keyframes_limited = 0
+        self._last_keyframe = 0.0
+        self._keyframe_lock = threading.Lock()
+
+        # Shared pose state for HTTP server
+        # Single writer (capture or pose thread) swaps in a new dict; readers take no lock
+        self.latest_pose = {"timestamp_ns": 0, "translation_m": [0.0, 0.0, 0.0], "orientation_xyzw": [0.0, 0.0, 0.0, 1.0], "status": "UNKNOWN"}
+        self.pose_updated = threading.Condition()
+        self._pose_waiters = 0
+        self._pose_cache = (None, b"", "")  # (timestamp_ns, body, etag), serialized lazily once per update
+        self.pose_samples = 0
+        self.pose_sampler = None
+        self.roi = None
+        self.pixel_format = args.pixel_format or self.source.native_format
+        self.pose_history = PoseHistory(int(args.pose_history_seconds * max(1, args.fps)) + 1)
+
+    def log(self, message: str) -> None:
+        print(f"{self.tag} {message}")
+
+    def open(self) -> bool:
+        args = self.args
+        if not self.source.open():
+            return False
+        out_w, out_h = self.source.width, self.source.height
+        try:
+            if args.retrieve_size:
+                out_w, out_h = (int(v) for v in args.retrieve_size.lower().split("x", 1))
+            self.roi = parse_roi(args.roi, out_w, out_h) if args.roi else None
+        except ValueError as e:
+            self.log(f"Error: bad --retrieve-size/--roi: {e}")
+            return False
+        self.source.configure_output(out_w, out_h, self.pixel_format)
+        self.width, self.height = (self.roi[2], self.roi[3]) if self.roi else (out_w, out_h)
+        return True
+
+    def start(self) -> bool:
+        args = self.args
+        fps = self.fps
+        self.frame_size = self.width * self.height * PIXEL_FORMATS[self.pixel_format]
+        self.appsrc_max_bytes = self.frame_size * max(1, args.appsrc_max_frames)
+        self.capture_ts_ext = not args.no_capture_ts_ext and capture_ts_ext_available()
+        if not args.no_capture_ts_ext and not self.capture_ts_ext:
+            self.log("Warning: rtponviftimestamp (gst-plugins-bad) not found; capture times will not be sent over RTP")
+        # Receiver reports (bitrate adaptation) and NACKs (retransmission) both need the RTCP path
+        self.rtcp = args.adaptive_bitrate or args.rtx
+        self.record_dir = ""
+        if args.record_dir and not self.backend.encoded:
+            self.log(f"Warning: backend '{self.backend.name}' produces no H.264 to record")
+        elif args.record_dir:
+            self.record_dir = os.path.join(args.record_dir, str(self.spec.port))
+            os.makedirs(self.record_dir, exist_ok=True)
+        if not self._build_pipeline():
+            return False
+
+        # Pre-allocate buffers/holders
+        if args.depth_port_offset and not self.source.supports_depth:
+            self.log(f"Warning: source '{self.source.name}' has no depth")
+        elif args.depth_port_offset:
+            depth_w, depth_h = (int(v) for v in args.depth_size.lower().split("x", 1))
+            self.source.configure_depth(depth_w, depth_h)
+            self.depth_sender = DepthSender(
+                args.host, self.spec.port + args.depth_port_offset, self.spec.serial or 0,
+                args.depth_codec, args.depth_level, self.log,
+            )
+        self.copy_stats = CopyStats()
+        self.frame_pool = FrameBufferPool(self.frame_size, args.pool_size, self.copy_stats) if args.copy_mode == "pool" else None
+        self.ring = FrameRing(args.ring_size, args.drop_policy)
+        self.backpressure = Backpressure(self.appsrc, self.appsrc_max_bytes, args.backpressure, 1.0 / max(1, fps))
+        self.rates = RateMeter(fps, ["grabbed", "captured", "pushed"])
+        self.timers = StageTimers(["grab", "pose", "retrieve", "copy", "push", "depth"], args.timer_window)
+        if args.pose_rate > 0 and not args.no_pose_tracking:
+            self.pose_sampler = PoseSampler(self.source, args.pose_rate, self._on_sampled_pose, f"zed-pose-{self.spec.port}")
+        self.push_results = {}
+        self.frame_duration_ns = int(1_000_000_000 // max(1, fps))
+        if self.bitrate_controller is not None:
+            GLib.timeout_add(int(args.abr_interval * 1000), self._poll_bitrate)
+
+        # Start pipeline
+        self.pipeline.set_state(Gst.State.PLAYING)
+        self.pipeline_up.set()
+
+        self.threads = [
+            threading.Thread(target=self._capture_loop, name=f"zed-capture-{self.spec.port}", daemon=True),
+            threading.Thread(target=self._push_loop, name=f"zed-push-{self.spec.port}", daemon=True),
+        ]
+        for thread in self.threads:
+            thread.start()
+        if self.pose_sampler is not None:
+            self.pose_sampler.start()
+        return True
+
+    def _build_pipeline(self) -> bool:
+        """Build the appsrc pipeline and (re)bind every helper that holds one of its elements."""
+        args = self.args
+        self.pipeline = build_pipeline(
+            args.host,
+            self.spec.port,
+            self.width,
+            self.height,
+            self.fps,
+            args.bitrate,
+            max_bytes=self.appsrc_max_bytes,
+            leaky=args.backpressure == "off",
+            capture_ts_ext=self.capture_ts_ext,
+            rtcp_port=self.spec.port + args.rtcp_port_offset if self.rtcp else 0,
+            backend=self.backend,
+            thumb=make_thumbnail_spec(args, self.spec.port),
+            gop=args.gop,
+            fec_percentage=args.fec_percentage,
+            rtx=args.rtx,
+            rtx_time_ms=args.rtx_time_ms,
+            record_location=os.path.join(self.record_dir, "%05d." + args.record_format) if self.record_dir else "",
+            record_format=args.record_format,
+            record_segment_seconds=args.record_segment_seconds,
+            pixel_format=self.pixel_format,
+        )
+        use_realtime_clock(self.pipeline)
+        self.appsrc = self.pipeline.get_by_name("src")
+        if self.appsrc is None:
+            self.log("Failed to get appsrc element")
+            self.pipeline = None
+            return False
+        if self.fanout is None:
+            self.fanout = ClientFanout(self.pipeline, args.rtcp_port_offset if self.rtcp else 0)
+            self.fanout.seed("main", args.host, self.spec.port)
+            thumb = make_thumbnail_spec(args, self.spec.port)
+            if thumb is not None:
+                self.fanout.seed("thumb", args.host, thumb.port)
+        else:
+            self.fanout.attach(self.pipeline)
+        splitmux = self.pipeline.get_by_name("rec")
+        if splitmux is not None and self.recorder is None:
+            self.recorder = SegmentRecorder(
+                splitmux, self.record_dir, args.record_format, args.record_max_files, args.record_max_mb * 1024 * 1024, self.log
+            )
+        elif splitmux is not None:
+            self.recorder.attach(splitmux)
+        if self.backpressure is not None:
+            self.backpressure.attach(self.appsrc)
+
+        bus = self.pipeline.get_bus()
+        bus.add_signal_watch()
+        bus.connect("message", self._on_bus_message)
+
+        encoder = self.pipeline.get_by_name("enc")
+        rtpbin = self.pipeline.get_by_name("rtpbin")
+        if args.adaptive_bitrate and self.bitrate_controller is not None:
+            self.bitrate_controller.attach(encoder, rtpbin)
+        elif args.adaptive_bitrate and encoder is None:
+            self.log(f"Warning: backend '{self.backend.name}' has no bitrate to adapt")
+        elif args.adaptive_bitrate:
+            self.bitrate_controller = BitrateController(encoder, self.backend, rtpbin, args, self.spec.port, self.log)
+        return True
+
+    def _teardown_pipeline(self) -> None:
+        """Take the pipeline down; capture keeps grabbing and frames are dropped until a rebuild."""
+        self.pipeline_up.clear()
+        self.pipeline.get_bus().remove_signal_watch()
+        self.pipeline.set_state(Gst.State.NULL)
+
+    def _schedule_rebuild(self, reason: str, appsrc=None) -> bool:
+        """Main loop: tear the failed pipeline down and build a fresh one after a backoff.
+
+        `appsrc` identifies the pipeline the failure came from, so a late report
+        from an already replaced pipeline does not trigger a second rebuild.
+        """
+        if self.stop_event.is_set() or not self.pipeline_up.is_set():
+            return False
+        if appsrc is not None and appsrc is not self.appsrc:
+            return False
+        now = time.monotonic()
+        if now - self._last_restart > PIPELINE_RESTART_RESET_S:
+            self._consecutive_restarts = 0
+        limit = self.args.max_pipeline_restarts
+        if limit and self._consecutive_restarts >= limit:
+            self.log(f"Pipeline failed ({reason}) after {limit} consecutive restarts; stopping")
+            self.stop_event.set()
+            return False
+        delay = min(PIPELINE_RESTART_MAX_DELAY_S, PIPELINE_RESTART_DELAY_S * 2 ** self._consecutive_restarts)
+        self._consecutive_restarts += 1
+        self._last_restart = now
+        self._down_since = now
+        self._teardown_pipeline()
+        self.log(f"Pipeline failed ({reason}); rebuilding in {delay:.1f}s")
+        GLib.timeout_add(int(delay * 1000), self._rebuild_pipeline)
+        return False
+
+    def _rebuild_pipeline(self) -> bool:
+        if self.stop_event.is_set():
+            return False
+        try:
+            built = self._build_pipeline()
+        except GLib.Error as e:
+            self.log(f"Pipeline rebuild failed: {e}")
+            built = False
+        if not built:
+            self.stop_event.set()
+            return False
+        self.pipeline.set_state(Gst.State.PLAYING)
+        self.pipeline_restarts += 1
+        self.pipeline_downtime_s += time.monotonic() - self._down_since
+        self.pipeline_up.set()
+        self.log(
+            f"Pipeline rebuilt (restarts={self.pipeline_restarts} "
+            f"downtime={self.pipeline_downtime_s:.2f}s total)"
+        )
+        return False
+
+    def downtime_seconds(self) -> float:
+        """Total time without a pipeline, including an ongoing outage."""
+        if self.pipeline_up.is_set() or self.pipeline is None:
+            return self.pipeline_downtime_s
+        return self.pipeline_downtime_s + time.monotonic() - self._down_since
+
+    def _on_bus_message(self, bus, msg):
+        if msg.type == Gst.MessageType.ERROR:
+            err, dbg = msg.parse_error()
+            self.log(f"Pipeline error: {err}, debug: {dbg}")
+            if pipeline_error_recoverable(err):
+                self._schedule_rebuild(f"{msg.src.get_name() if msg.src else 'pipeline'}: {err.message}")
+            else:
+                self.stop_event.set()
+        elif msg.type == Gst.MessageType.EOS:
+            self.log("Pipeline EOS")
+            self.stop_event.set()
+        elif msg.type == Gst.MessageType.ELEMENT and self.recorder is not None:
+            structure = msg.get_structure()
+            if structure is not None and structure.get_name() == "splitmuxsink-fragment-closed":
+                self.recorder.on_fragment_closed()
+
+    def _poll_bitrate(self) -> bool:
+        if self.stop_event.is_set() or self.bitrate_controller is None:
+            return False
+        if not self.pipeline_up.is_set():
+            return True
+        return self.bitrate_controller.poll()
+
+    def request_keyframe(self):
+        """Ask every encoder in the pipeline for an IDR with SPS/PPS, rate-limited.
+
+        The force-key-unit event is pushed upstream from the payloader's sink
+        pad, through h264parse to the encoder. Returns (result, retry_after_s)
+        with result "forced", "rate-limited" or "pipeline-down"; only a forced
+        keyframe is counted and starts the rate-limit interval.
+        """
+        with self._keyframe_lock:
+            pipeline = self.pipeline
+            if pipeline is None or not self.pipeline_up.is_set():
+                return "pipeline-down", PIPELINE_RESTART_DELAY_S
+            now = time.monotonic()
+            wait = self._last_keyframe + self.args.keyframe_min_interval - now
+            if wait > 0:
+                self.keyframes_limited += 1
+                return "rate-limited", wait
+            self._last_keyframe = now
+            self.keyframes_forced += 1
+        for name in ("pay", "pay_thumb"):
+            pay = pipeline.get_by_name(name)
+            if pay is None:
+                continue
+            event = GstVideo.video_event_new_upstream_force_key_unit(Gst.CLOCK_TIME_NONE, True, self.keyframes_forced)
+            pay.get_static_pad("sink").push_event(event)
+        return "forced", 0.0
+
+    def metrics(self):
+        """(name, type, help, labels, value) samples for /metrics and --metrics-csv."""
+        if self.pipeline is None:
+            return []
+        cam = {"camera": str(self.spec.port), "serial": str(self.spec.serial or "")}
+        samples = []
+        for stage in self.timers.count:
+            for q, value in zip(("0.5", "0.95", "0.99"), self.timers.percentiles(stage)):
+                samples.append(("zed_stage_seconds", "summary", "Per-frame stage duration", dict(cam, stage=stage, quantile=q), f"{value:.6f}"))
+            samples.append(("zed_stage_seconds_sum", "summary", "", dict(cam, stage=stage), f"{self.timers.sum_ns[stage] / 1e9:.6f}"))
+            samples.append(("zed_stage_seconds_count", "summary", "", dict(cam, stage=stage), self.timers.count[stage]))
+        for kind, total in self.rates.totals.items():
+            samples.append(("zed_frames_total", "counter", "Frames per pipeline step", dict(cam, kind=kind), total))
+        drops = {
+            "ring": self.ring.dropped,
+            "backpressure_skip": self.backpressure.skipped,
+            "pool_miss": self.copy_stats.pool_misses,
+        }
+        if self.depth_sender is not None:
+            drops["depth_replaced"] = self.depth_sender.replaced
+        drops["pipeline_down"] = self.frames_dropped_down
+        for reason, total in drops.items():
+            samples.append(("zed_drops_total", "counter", "Frames dropped or degraded, by reason", dict(cam, reason=reason), total))
+        for result, total in list(self.push_results.items()):
+            samples.append(("zed_push_results_total", "counter", "appsrc push-buffer return codes", dict(cam, result=result), total))
+        samples.append(("zed_ring_depth", "gauge", "Frames waiting between capture and push", cam, self.ring.depth))
+        samples.append(("zed_appsrc_level_bytes", "gauge", "Bytes queued in appsrc", cam, self.backpressure.level_bytes()))
+        for name in ("encq", "rec_q"):
+            queue = self.pipeline.get_by_name(name)
+            if queue is None:
+                continue
+            labels = dict(cam, queue="encoder" if name == "encq" else "recording")
+            samples.append(("zed_queue_buffers", "gauge", "Buffers queued ahead of the encoder/recorder", labels, queue.get_property("current-level-buffers")))
+            samples.append(("zed_queue_bytes", "gauge", "Bytes queued ahead of the encoder/recorder", labels, queue.get_property("current-level-bytes")))
+        samples.append(("zed_pose_samples_total", "counter", "Poses read from the source", cam, self.pose_samples))
+        samples.append(("zed_pipeline_up", "gauge", "1 while the GStreamer pipeline is playing", cam, int(self.pipeline_up.is_set())))
+        samples.append(("zed_pipeline_restarts_total", "counter", "In-place pipeline rebuilds after errors", cam, self.pipeline_restarts))
+        samples.append(("zed_pipeline_downtime_seconds_total", "counter", "Time spent without a pipeline", cam, f"{self.downtime_seconds():.3f}"))
+        if self.bitrate_controller is not None:
+            samples.append(("zed_encoder_bitrate_bps", "gauge", "Current adaptive encoder bitrate", cam, self.bitrate_controller.bitrate))
+        return samples
+
+    def update_pose(self, capture_ns: int, seq: int):
+        """Read the pose of the frame just grabbed and publish it with the frame's capture time."""
+        t0 = time.perf_counter_ns()
+        try:
+            pose = self.source.pose()
+        except Exception:
+            # Non-fatal; keep streaming video
+            return
+        self.publish_pose(capture_ns, seq, pose)
+        self.timers.record("pose", time.perf_counter_ns() - t0)
+
+    def _on_sampled_pose(self, capture_ns: int, seq: int, pose) -> None:
+        t0 = time.perf_counter_ns()
+        self.publish_pose(capture_ns, seq, pose)
+        self.timers.record("pose", time.perf_counter_ns() - t0)
+
+    def publish_pose(self, capture_ns: int, seq: int, pose) -> None:
+        """Make one pose sample visible to HTTP, the history and the multicast records."""
+        translation, orientation, state, status = pose
+        self.latest_pose = {"timestamp_ns": capture_ns, "translation_m": translation, "orientation_xyzw": orientation, "status": status}
+        if self._pose_waiters:
+            with self.pose_updated:
+                self.pose_updated.notify_all()
+        self.pose_history.append(capture_ns, seq, translation, orientation, state)
+        if self.pose_publisher is not None:
+            self.pose_publisher.publish(self.spec.serial, seq, self.pose_samples, capture_ns, translation, orientation, state)
+        self.pose_samples += 1
+
+    def pose_snapshot(self):
+        """Return (timestamp_ns, body, etag) for the latest pose, serializing at most once per update."""
+        pose = self.latest_pose
+        cache = self._pose_cache
+        ts = pose["timestamp_ns"]
+        if cache[0] != ts:
+            # Racing readers may both serialize; either result is correct
+            cache = (ts, json.dumps(pose).encode("utf-8"), f'"{ts}"')
+            self._pose_cache = cache
+        return cache
+
+    def wait_pose_after(self, after_ns: int, timeout: float):
+        """Block until a pose newer than `after_ns` exists; returns its snapshot or None on timeout."""
+        with self.pose_updated:
+            self._pose_waiters += 1
+            try:
+                if not self.pose_updated.wait_for(lambda: self.latest_pose["timestamp_ns"] > after_ns, timeout):
+                    return None
+            finally:
+                self._pose_waiters -= 1
+        return self.pose_snapshot()
+
+    def _release_frame(self, frame: CapturedFrame) -> None:
+        if self.frame_pool is not None:
+            self.frame_pool.release(frame.buffer)
+
+    def _capture_loop(self):
+        source = self.source
+        frame_index = 0
+        grab_seq = 0
+        timers = self.timers
+        sampler = self.pose_sampler
+        roi = self.roi
+        pose_every = 0 if self.args.no_pose_tracking or sampler is not None else max(1, self.args.pose_every)
+        depth_period_ns = int(1e9 / self.args.depth_fps) if self.depth_sender is not None else 0
+        next_depth_ns = 0
+        while not self.stop_event.is_set():
+            want_depth = self.depth_sender is not None and time.time_ns() >= next_depth_ns
+            t0 = time.perf_counter_ns()
+            if not source.grab(depth=want_depth):
+                # Keep looping; could add sleep(0) to yield
+                continue
+            t1 = time.perf_counter_ns()
+            timers.record("grab", t1 - t0)
+            self.rates.count("grabbed")
+            self.ready.set()
+
+            # Capture time of this frame (host wall clock, ns since Unix epoch)
+            capture_ns = source.capture_ns()
+            # Pose of this exact grab, stamped like the video buffer (or left to the pose thread)
+            if sampler is not None:
+                sampler.note_grab(capture_ns, grab_seq)
+            elif pose_every and grab_seq % pose_every == 0:
+                self.update_pose(capture_ns, grab_seq)
+            grab_seq += 1
+
+            # The camera keeps grabbing (and pose keeps flowing) while the pipeline is rebuilt
+            if not self.pipeline_up.is_set():
+                self.frames_dropped_down += 1
+            elif self._queue_frame(frame_index, capture_ns, roi):
+                frame_index += 1
+
+            # Depth after the video frame is queued, so it never delays the push. It does not
+            # depend on the frame: a grab that paid for depth sends it even when video was skipped.
+            if want_depth:
+                next_depth_ns = max(next_depth_ns + depth_period_ns, capture_ns)
+                t2 = time.perf_counter_ns()
+                self._send_depth(capture_ns)
+                timers.record("depth", time.perf_counter_ns() - t2)
+
+    def _queue_frame(self, frame_index: int, capture_ns: int, roi) -> bool:
+        """Retrieve and copy the grabbed image into the ring; False if it was skipped."""
+        # Back off before the costly retrieve-and-copy when appsrc is full
+        if not self.backpressure.admit():
+            return False
+
+        t0 = time.perf_counter_ns()
+        np_img = self.source.retrieve_image()
+        if roi is not None:
+            # A view; only the region is copied below
+            np_img = np_img[roi[1]:roi[1] + roi[3], roi[0]:roi[0] + roi[2]]
+        t1 = time.perf_counter_ns()
+        self.timers.record("retrieve", t1 - t0)
+
+        # Write frame bytes into buffer
+        try:
+            if self.frame_pool is not None:
+                buf = self.frame_pool.copy_frame(np_img)
+            else:
+                buf = legacy_frame_buffer(np_img, self.copy_stats)
+        except Exception as e:
+            self.log(f"Warning: failed to fill GstBuffer: {e}; skipping frame")
+            return False
+
+        self.timers.record("copy", time.perf_counter_ns() - t1)
+        self.rates.count("captured")
+        discarded = self.ring.put(CapturedFrame(buf, frame_index, capture_ns))
+        if discarded is not None:
+            self._release_frame(discarded)
+        return True
+
+    def _send_depth(self, capture_ns: int) -> None:
+        t0 = time.perf_counter()
+        depth_m = self.source.retrieve_depth()
+        if depth_m is None:
+            return
+        depth_mm = quantize_depth_mm(depth_m)
+        self.depth_sender.submit(capture_ns, depth_mm, time.perf_counter() - t0)
+
+    def _push_loop(self):
+        last_pts = 0
+        while not self.stop_event.is_set():
+            frame = self.ring.get(timeout=0.1)
+            if frame is None:
+                continue
+            appsrc = self.appsrc
+            if not self.pipeline_up.is_set():
+                self.frames_dropped_down += 1
+                self._release_frame(frame)
+                continue
+
+            buf = frame.buffer
+            # Timestamping: running time is Unix time, so the sensor timestamp is the PTS.
+            # Keep PTS strictly increasing in case the SDK repeats a timestamp.
+            pts = max(frame.capture_ns, last_pts + 1)
+            last_pts = pts
+            buf.pts = pts
+            buf.dts = pts
+            buf.duration = self.frame_duration_ns
+
+            t0 = time.perf_counter_ns()
+            ret = appsrc.emit("push-buffer", buf)
+            self.timers.record("push", time.perf_counter_ns() - t0)
+            result = ret.value_nick.upper() if hasattr(ret, "value_nick") else str(ret)
+            self.push_results[result] = self.push_results.get(result, 0) + 1
+            self._release_frame(frame)
+            if ret != Gst.FlowReturn.OK:
+                if self.stop_event.is_set() or not self.pipeline_up.is_set():
+                    continue
+                # Pipeline state belongs to the main loop; the rebuild runs there
+                GLib.idle_add(self._schedule_rebuild, f"push-buffer returned {result}", appsrc)
+                continue
+            self.rates.count("pushed")
+
+    def report(self, interval: float) -> None:
+        line = self.copy_stats.report(interval)
+        if line is None:
+            return
+        for part in (line, self.ring.summary(), self.backpressure.summary(), self.rates.summary(), self.fanout.summary()):
+            self.log(part)
+        self.log(self.timers.summary())
+        if self.pipeline_restarts or not self.pipeline_up.is_set():
+            self.log(
+                f"[pipeline] up={self.pipeline_up.is_set()} restarts={self.pipeline_restarts} "
+                f"downtime={self.downtime_seconds():.2f}s dropped_while_down={self.frames_dropped_down}"
+            )
+        if self.recorder is not None:
+            self.log(self.recorder.summary())
+        if self.depth_sender is not None:
+            self.log(self.depth_sender.summary())
+
+    def stop(self) -> None:
+        self.stop_event.set()
+        if self.pose_sampler is not None:
+            self.pose_sampler.close()
+        if self.pipeline is not None:
+            self.ring.close()
+            for thread in self.threads:
+                thread.join(timeout=2.0)
+            for frame in self.ring.drain():
+                self._release_frame(frame)
+            if self.pipeline_up.is_set():
+                try:
+                    self.appsrc.emit("end-of-stream")
+                except Exception:
+                    pass
+                if self.recorder is not None:
+                    # Let splitmuxsink finalise the open segment before tearing down
+                    self.pipeline.get_bus().timed_pop_filtered(2 * Gst.SECOND, Gst.MessageType.EOS | Gst.MessageType.ERROR)
+                self._teardown_pipeline()
+        self.source.close()
+        if self.pipeline is not None:
+            self.log(self.copy_stats.summary())
+            self.log(self.ring.summary())
+            self.log(self.backpressure.summary())
+            if self.pipeline_restarts:
+                self.log(f"[pipeline] restarts={self.pipeline_restarts} downtime={self.downtime_seconds():.2f}s")
+        if self.recorder is not None:
+            self.log(self.recorder.summary())
+            self.recorder.close()
+        if self.depth_sender is not None:
+            self.log(self.depth_sender.summary())
+            self.depth_sender.close()
+        if self.bitrate_controller is not None:
+            self.log(f"[abr] final bitrate={self.bitrate_controller.bitrate} adjustments={self.bitrate_controller.adjustments}")
+            self.bitrate_controller.close()
+
+
+class BitrateController:
+    """AIMD encoder bitrate control from RTCP receiver reports.
+
+    Every interval the sender's internal RTP source is read for the latest
+    report block (fraction lost, interarrival jitter, round trip). Loss or
+    jitter above the high marks scales the bitrate down; a clean report adds
+    a fixed step. Each decision is appended to a CSV time series.
+    """
+
+    CSV_HEADER = "time_s,camera_port,fraction_lost,jitter_ms,rtt_ms,old_bps,new_bps,reason\n"
+
+    def __init__(self, encoder, backend: EncoderBackend, rtpbin, args: argparse.Namespace, port: int, log):
+        self.encoder = encoder
+        self.backend = backend
+        self.rtpbin = rtpbin
+        self.port = port
+        self.log = log
+        self.min_bps = args.min_bitrate
+        self.max_bps = args.max_bitrate or args.bitrate
+        self.step_up = args.bitrate_step_up
+        self.decrease = args.bitrate_decrease
+        self.loss_high = args.loss_high
+        self.loss_low = args.loss_low
+        self.jitter_high_ms = args.jitter_high_ms
+        self.bitrate = min(max(args.bitrate, self.min_bps), self.max_bps)
+        self.adjustments = 0
+        self._last_rb_seq = None
+        self._csv = None
+        if args.abr_log:
+            new_file = not os.path.exists(args.abr_log)
+            self._csv = open(args.abr_log, "a", buffering=1)
+            if new_file:
+                self._csv.write(self.CSV_HEADER)
+
+    def attach(self, encoder, rtpbin) -> None:
+        """Adopt a rebuilt pipeline's encoder and rtpbin, keeping the adapted bitrate."""
+        self.encoder = encoder
+        self.rtpbin = rtpbin
+        self._last_rb_seq = None
+        self.backend.set_bitrate(encoder, self.bitrate)
+
+    def decide(self, fraction_lost: float, jitter_ms: float):
+        """Return (new_bitrate, reason) for one receiver report."""
+        if fraction_lost > self.loss_high:
+            return max(self.min_bps, int(self.bitrate * self.decrease)), "loss"
+        if jitter_ms > self.jitter_high_ms:
+            return max(self.min_bps, int(self.bitrate * self.decrease)), "jitter"
+        if fraction_lost <= self.loss_low and jitter_ms <= self.jitter_high_ms / 2:
+            return min(self.max_bps, self.bitrate + self.step_up), "clean"
+        return self.bitrate, "hold"
+
+    def _receiver_report(self):
+        session = self.rtpbin.emit("get-internal-session", 0)
+        if session is None:
+            return None
+        source = session.get_property("internal-source")
+        stats = source.get_property("stats") if source is not None else None
+        if stats is None or not stats.get_value("have-rb"):
+            return None
+        clock_rate = stats.get_value("clock-rate") or 90000
+        return {
+            "seq": stats.get_value("rb-exthighestseq"),
+            "fraction_lost": stats.get_value("rb-fractionlost") / 256.0,
+            "jitter_ms": stats.get_value("rb-jitter") * 1000.0 / clock_rate,
+            # round trip is in NTP short format (1/65536 s)
+            "rtt_ms": stats.get_value("rb-round-trip") * 1000.0 / 65536.0,
+        }
+
+    def poll(self) -> bool:
+        """GLib timeout callback; always returns True to stay scheduled."""
+        try:
+            report = self._receiver_report()
+        except Exception as e:
+            self.log(f"Warning: failed to read RTCP stats: {e}")
+            return True
+        if report is None or report["seq"] == self._last_rb_seq:
+            return True
+        self._last_rb_seq = report["seq"]
+        old = self.bitrate
+        new, reason = self.decide(report["fraction_lost"], report["jitter_ms"])
+        if new != old:
+            self.backend.set_bitrate(self.encoder, new)
+            self.bitrate = new
+            self.adjustments += 1
+            self.log(
+                f"[abr] {reason}: loss={report['fraction_lost']:.3f} jitter={report['jitter_ms']:.1f}ms "
+                f"rtt={report['rtt_ms']:.1f}ms bitrate {old} -> {new}"
+            )
+        if self._csv is not None:
+            self._csv.write(
+                f"{time.time():.3f},{self.port},{report['fraction_lost']:.4f},{report['jitter_ms']:.2f},"
+                f"{report['rtt_ms']:.2f},{old},{new},{reason}\n"
+            )
+        return True
+
+    def close(self) -> None:
+        if self._csv is not None:
+            self._csv.close()
+            self._csv = None
+
+
+def run_http_server(port: int, streamers: list, client_hosts: str = "") -> None:
+    """Serve pose JSON for every camera plus a minimal overlay page.
+
+    /pose.json returns the first camera; /pose.json?serial=N or ?port=N picks another.
+    It carries an ETag (the pose timestamp) and honours If-None-Match.
+    /pose/next?after=NS long-polls until a newer pose exists (timeout=S, default 5).
+    /pose/at?ts=NS returns the interpolated pose at a capture time, and
+    /pose/since?since=NS the history after it (format=ndjson or bin).
+    POST /keyframe?port=N forces an IDR on that camera's encoders (429 when rate-limited,
+    503 while its pipeline is being rebuilt).
+    GET /clients.json lists every camera's fan-out clients with byte/packet counters;
+    POST /clients/add and /clients/remove take port=N (camera), client_port=P,
+    optional host= (defaults to the requesting address; any other host must be
+    listed in --client-hosts, else 403) and stream=main|thumb.
+    /metrics is Prometheus text: stage timer quantiles, frame/drop/push counters, queue levels.
+    /recordings.json?port=N&from=NS&to=NS returns the keyframe (file, byte offset)
+    to start cutting from and the segments covering the window (--record-dir).
+
+    Each request runs on its own thread, so a slow client never blocks the others.
+    """
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+    from urllib.parse import urlsplit, parse_qs
+
+    allowed_hosts = {h.strip() for h in client_hosts.split(",") if h.strip()}
+
+    # Static responses are built once and served from memory
+    html = POSE_PAGE.encode("utf-8")
+    html_etag = '"' + hashlib.sha1(html).hexdigest()[:16] + '"'
+    cameras_body = json.dumps([{"serial": st.spec.serial, "port": st.spec.port} for st in streamers]).encode("utf-8")
+
+    def find_streamer(query: dict):
+        for key in ("serial", "port"):
+            if key in query:
+                try:
+                    wanted = int(query[key][0])
+                except ValueError:
+                    return None
+                return next((st for st in streamers if getattr(st.spec, key) == wanted), None)
+        return streamers[0] if streamers else None
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"  # keep-alive for dashboards that poll
+
+        def _send(self, code: int, content_type: str, body: bytes, headers=None):
+            self.send_response(code)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(body)))
+            for name, value in (headers or {}).items():
+                self.send_header(name, value)
+            self.end_headers()
+            self.wfile.write(body)
+
+        def _send_cached(self, content_type: str, body: bytes, etag: str, cache_control: str):
+            headers = {"ETag": etag, "Cache-Control": cache_control}
+            if self.headers.get("If-None-Match") == etag:
+                self._send(304, content_type, b"", headers)
+            else:
+                self._send(200, content_type, body, headers)
+
+        def do_POST(self):
+            url = urlsplit(self.path)
+            if url.path in ("/clients/add", "/clients/remove"):
+                self._update_clients(url)
+                return
+            if url.path != "/keyframe":
+                self._send(404, "application/json", b'{"error": "not found"}')
+                return
+            streamer = find_streamer(parse_qs(url.query))
+            if streamer is None:
+                self._send(404, "application/json", b'{"error": "unknown camera"}')
+                return
+            result, retry_after = streamer.request_keyframe()
+            if result == "forced":
+                self._send(200, "application/json", b'{"keyframe": "requested"}')
+                return
+            headers = {"Retry-After": str(max(1, int(retry_after + 0.999)))}
+            if result == "rate-limited":
+                self._send(429, "application/json", b'{"keyframe": "rate-limited"}', headers)
+            else:
+                self._send(503, "application/json", b'{"keyframe": "pipeline restarting"}', headers)
+
+        def _update_clients(self, url):
+            query = parse_qs(url.query)
+            streamer = find_streamer(query)
+            if streamer is None or streamer.fanout is None:
+                self._send(404, "application/json", b'{"error": "unknown camera"}')
+                return
+            try:
+                client_port = int(query["client_port"][0])
+            except (KeyError, ValueError):
+                self._send(400, "application/json", b'{"error": "expected integer client_port="}')
+                return
+            host = query.get("host", [self.client_address[0]])[0]
+            if host != self.client_address[0] and host not in allowed_hosts and "*" not in allowed_hosts:
+                # Otherwise anyone reaching the HTTP port could aim the stream at a third party
+                self._send(403, "application/json", b'{"error": "host not allowed, see --client-hosts"}')
+                return
+            stream = query.get("stream", ["main"])[0]
+            if url.path == "/clients/add":
+                ok = streamer.fanout.add(stream, host, client_port)
+            else:
+                ok = streamer.fanout.remove(stream, host, client_port)
+            if not ok:
+                self._send(404, "application/json", b'{"error": "unknown stream or client"}')
+                return
+            body = {"camera": streamer.spec.port, "stream": stream, "host": host, "port": client_port}
+            self._send(200, "application/json", json.dumps(body).encode("utf-8"))
+
+        def do_GET(self):
+            url = urlsplit(self.path)
+            if url.path == "/pose.json":
+                streamer = find_streamer(parse_qs(url.query))
+                if streamer is None:
+                    self._send(404, "application/json", b'{"error": "unknown camera"}')
+                    return
+                _, body, etag = streamer.pose_snapshot()
+                self._send_cached("application/json", body, etag, "no-cache")
+            elif url.path == "/pose/next":
+                self._long_poll(url)
+            elif url.path in ("/pose/at", "/pose/since"):
+                self._history_query(url)
+            elif url.path == "/cameras.json":
+                self._send(200, "application/json", cameras_body)
+            elif url.path == "/metrics":
+                samples = [sample for st in streamers for sample in st.metrics()]
+                self._send(200, "text/plain; version=0.0.4", render_prometheus(samples).encode("utf-8"))
+            elif url.path == "/recordings.json":
+                self._recordings(url)
+            elif url.path == "/clients.json":
+                clients = {st.spec.port: st.fanout.describe() for st in streamers if st.fanout is not None}
+                self._send(200, "application/json", json.dumps(clients).encode("utf-8"))
+            else:
+                # Minimal overlay page using long-polling
+                self._send_cached("text/html; charset=utf-8", html, html_etag, "public, max-age=3600")
+
+        def _long_poll(self, url):
+            query = parse_qs(url.query)
+            streamer = find_streamer(query)
+            if streamer is None:
+                self._send(404, "application/json", b'{"error": "unknown camera"}')
+                return
+            try:
+                after = int(query.get("after", ["0"])[0])
+                timeout = min(float(query.get("timeout", ["5"])[0]), 30.0)
+            except ValueError:
+                self._send(400, "application/json", b'{"error": "expected integer after= and numeric timeout="}')
+                return
+            snapshot = streamer.wait_pose_after(after, timeout)
+            if snapshot is None:
+                self._send(204, "application/json", b"")
+                return
+            _, body, etag = snapshot
+            self._send(200, "application/json", body, {"ETag": etag, "Cache-Control": "no-store"})
+
+        def _recordings(self, url):
+            query = parse_qs(url.query)
+            streamer = find_streamer(query)
+            if streamer is None or streamer.recorder is None:
+                self._send(404, "application/json", b'{"error": "camera not recording"}')
+                return
+            try:
+                start_ns = int(query.get("from", ["0"])[0])
+                end_ns = int(query.get("to", [str(2**63 - 1)])[0])
+            except ValueError:
+                self._send(400, "application/json", b'{"error": "expected integer ns from= and to="}')
+                return
+            body = json.dumps(streamer.recorder.window(start_ns, end_ns)).encode("utf-8")
+            self._send(200, "application/json", body)
+
+        def _history_query(self, url):
+            query = parse_qs(url.query)
+            streamer = find_streamer(query)
+            if streamer is None:
+                self._send(404, "application/json", b'{"error": "unknown camera"}')
+                return
+            try:
+                if url.path == "/pose/at":
+                    ts = int(query["ts"][0])
+                else:
+                    ts = int(query.get("since", ["0"])[0])
+            except (KeyError, ValueError):
+                self._send(400, "application/json", b'{"error": "expected integer ns timestamp"}')
+                return
+            if url.path == "/pose/at":
+                sample = streamer.pose_history.at(ts)
+                if sample is None:
+                    self._send(404, "application/json", b'{"error": "timestamp outside pose history"}')
+                    return
+                self._send(200, "application/json", json.dumps(sample).encode("utf-8"))
+                return
+            fmt = query.get("format", ["ndjson"])[0]
+            body = encode_pose_samples(streamer.spec.serial, streamer.pose_history.since(ts), fmt)
+            self._send(200, "application/octet-stream" if fmt == "bin" else "application/x-ndjson", body)
+
+        def log_message(self, format, *args):
+            return  # quiet
+
+    httpd = ThreadingHTTPServer(("0.0.0.0", port), Handler)
+    httpd.daemon_threads = True
+    try:
+        httpd.serve_forever()
+    except Exception:
+        pass
+
+
+def main() -> int:
+    args = parse_args()
+
+    Gst.init(None)
+    if args.benchmark_encoders:
+        return run_encoder_benchmark(args)
+    if args.benchmark_loss:
+        return run_loss_benchmark(args)
+    if sl is None and args.source == "zed":
+        print("Error: pyzed (ZED SDK Python) not found. Ensure ZED SDK + Python bindings are installed.")
+        print(str(PYZED_IMPORT_ERROR))
+        return 1
+    if args.benchmark_pose:
+        return run_pose_benchmark(args)
+    if args.benchmark_retrieve:
+        return run_retrieve_benchmark(args)
+    specs = parse_camera_specs(args)
+    try:
+        backend = select_encoder_backend(args.encoder)
+    except RuntimeError as e:
+        print(f"Error: {e}")
+        return 3
+    print(f"Encoder backend: {backend.name}")
+    stop_event = threading.Event()
+    pose_publisher = make_pose_publisher(args)
+    if pose_publisher is not None:
+        print(f"Pose records: {pose_publisher.describe()}")
+
+    def handle_sigint(signum, frame):
+        stop_event.set()
+
+    signal.signal(signal.SIGINT, handle_sigint)
+    signal.signal(signal.SIGTERM, handle_sigint)
+
+    # Open cameras one after another; the next one starts once the previous is
+    # delivering frames instead of after a fixed sleep.
+    streamers = []
+    profile_cache = ProfileCache(args.profile_cache) if args.profile_cache and args.source == "zed" else None
+    for spec in specs:
+        if stop_event.is_set():
+            break
+        streamer = CameraStreamer(spec, args, backend, pose_publisher, profile_cache)
+        t0 = time.monotonic()
+        if not streamer.open():
+            streamer.stop()
+            continue
+        if not streamer.start():
+            streamer.stop()
+            continue
+        streamers.append(streamer)
+        if streamer.ready.wait(args.ready_timeout):
+            streamer.log(f"Streaming {streamer.width}x{streamer.height}@{streamer.fps} after {time.monotonic() - t0:.1f}s")
+        else:
+            streamer.log(f"Warning: no frame within {args.ready_timeout:.0f}s; opening next camera anyway")
+
+    if not streamers:
+        print("No camera could be started")
+        return 2
+
+    http_thread = threading.Thread(target=run_http_server, args=(args.http_port, streamers, args.client_hosts), daemon=True)
+    http_thread.start()
+
+    loop = GLib.MainLoop()
+    deadline = time.monotonic() + args.duration if args.duration > 0 else None
+
+    def tick():
+        for streamer in streamers:
+            streamer.report(args.stats_interval)
+        if deadline is not None and time.monotonic() >= deadline:
+            stop_event.set()
+        if stop_event.is_set() or all(st.stop_event.is_set() for st in streamers):
+            loop.quit()
+            return False
+        return True
+
+    GLib.timeout_add(200, tick)
+    metrics_log = MetricsCsvLog(args.metrics_csv) if args.metrics_csv else None
+    if metrics_log is not None:
+
+        def write_metrics():
+            metrics_log.write([sample for st in streamers for sample in st.metrics()])
+            return True
+
+        GLib.timeout_add(int(args.metrics_interval * 1000), write_metrics)
+    try:
+        loop.run()
+    finally:
+        for streamer in streamers:
+            streamer.stop()
+        if metrics_log is not None:
+            metrics_log.close()
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())